@@ -3,15 +3,26 @@ import { motion } from 'framer-motion';
 import { Sun, Moon, List, BookOpen, Cloud, FileText } from 'react-feather';
 import Todoist from './components/Todoist';
 import Notion from './components/Notion';
+import { subscribe } from './stream';
 
-const WeatherService = () => {
-  const [weatherData, setWeatherData] = useState(null);
+const WeatherService = ({ initialWeather }) => {
+  const [weatherData, setWeatherData] = useState(initialWeather || null);
 
-  useEffect(() => {
+  const loadWeather = () => {
     fetch('http://localhost:8000/api/weather')
       .then(response => response.json())
       .then(data => setWeatherData(data))
       .catch(error => console.error('Error fetching weather data:', error));
+  };
+
+  useEffect(() => {
+    if (initialWeather) return;
+    loadWeather();
+  }, [initialWeather]);
+
+  useEffect(() => {
+    const unsubscribers = [subscribe('forecast.updated', loadWeather), subscribe('reset', loadWeather)];
+    return () => unsubscribers.forEach(unsubscribe => unsubscribe());
   }, []);
 
   if (!weatherData) return <div className="animate-pulse">Loading weather...</div>;
@@ -30,12 +41,12 @@ const WeatherService = () => {
   );
 };
 
-const NewsService = () => {
-  const [news, setNews] = useState([]);
-  const [loading, setLoading] = useState(true);
+const NewsService = ({ initialNews }) => {
+  const [news, setNews] = useState(initialNews || []);
+  const [loading, setLoading] = useState(!initialNews);
 
-  useEffect(() => {
-    fetch('http://localhost:8000/api/news')
+  const loadNews = () => {
+    fetch('http://localhost:8000/api/news?limit=20')
       .then(response => response.json())
       .then(data => {
         setNews(data);
@@ -45,6 +56,16 @@ const NewsService = () => {
         console.error('Error fetching news data:', error);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    if (initialNews) return;
+    loadNews();
+  }, [initialNews]);
+
+  useEffect(() => {
+    const unsubscribers = [subscribe('news.refreshed', loadNews), subscribe('reset', loadNews)];
+    return () => unsubscribers.forEach(unsubscribe => unsubscribe());
   }, []);
 
   if (loading) return <div className="animate-pulse">Loading news...</div>;
@@ -93,6 +114,20 @@ const ThemeToggle = ({ isDark, toggleTheme }) => (
 function HandleApp() {
   const [isDark, setIsDark] = useState(true);
   const toggleTheme = () => setIsDark(!isDark);
+  // One snapshot for all panels; a panel whose section is missing fetches on its own
+  const [sections, setSections] = useState(null);
+
+  useEffect(() => {
+    fetch('http://localhost:8000/api/dashboard')
+      .then(response => response.json())
+      .then(data => setSections(data.sections))
+      .catch(error => {
+        console.error('Error fetching dashboard:', error);
+        setSections({});
+      });
+  }, []);
+
+  const sectionData = (name) => (sections[name] && sections[name].data) || undefined;
 
   return (
     <div className={`min-h-screen ${isDark ? 'bg-gray-900 text-gray-200' : 'bg-gray-100 text-gray-800'} transition-colors duration-500`}>
@@ -101,20 +136,24 @@ function HandleApp() {
         <h1 className="text-4xl font-bold mb-8 bg-clip-text text-transparent bg-gradient-to-r from-blue-400 to-purple-600">
           Personal Dashboard
         </h1>
+        {!sections ? (
+          <div className="animate-pulse">Loading dashboard...</div>
+        ) : (
         <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6">
           <DashboardItem title="Todoist" icon={List}>
-            <Todoist />
+            <Todoist initialTasks={sectionData('tasks')} />
           </DashboardItem>
           <DashboardItem title="Notion" icon={BookOpen}>
-            <Notion />
+            <Notion initialEvents={sectionData('events')} />
           </DashboardItem>
           <DashboardItem title="Weather" icon={Cloud}>
-            <WeatherService />
+            <WeatherService initialWeather={sectionData('weather')} />
           </DashboardItem>
           <DashboardItem title="News" icon={FileText}>
-            <NewsService />
+            <NewsService initialNews={sectionData('news')} />
           </DashboardItem>
         </div>
+        )}
       </div>
       <footer className={`${isDark ? 'bg-gray-800 text-gray-400' : 'bg-gray-200 text-gray-600'} text-center p-4 transition-colors duration-500`}>
         <p>&copy; {new Date().getFullYear()} Personal Dashboard</p>
@@ -1,9 +1,47 @@
-
 import React, { useEffect, useState } from 'react';
+
+// Local midnight as "YYYY-MM-DDTHH:MM:SS", the naive time the events are indexed in
+const toLocalISO = (date) => {
+    const pad = (n) => String(n).padStart(2, '0');
+    return `${date.getFullYear()}-${pad(date.getMonth() + 1)}-${pad(date.getDate())}T00:00:00`;
+};
+
 function Calendar() {
+    const [month, setMonth] = useState(() => {
+        const now = new Date();
+        return new Date(now.getFullYear(), now.getMonth(), 1);
+    });
+    const [events, setEvents] = useState([]);
+
+    useEffect(() => {
+        // Only ask for the month that is rendered
+        const next = new Date(month.getFullYear(), month.getMonth() + 1, 1);
+        const params = new URLSearchParams({ from: toLocalISO(month), to: toLocalISO(next) });
+        fetch(`http://localhost:8000/api/events?${params}`)
+            .then(response => response.json())
+            .then(data => setEvents(data))
+            .catch(error => console.error('Error fetching calendar events:', error));
+    }, [month]);
+
+    const shiftMonth = (offset) => setMonth(new Date(month.getFullYear(), month.getMonth() + offset, 1));
+
     return (
         <div className="bg-grey shadow-lg rounded-lg p-6">
-        <h1 className="text-2xl font-bold mb-4">Calendar</h1>
+        <div className="flex items-center justify-between mb-4">
+            <button onClick={() => shiftMonth(-1)} className="text-gray-400 hover:text-gray-200">&lt;</button>
+            <h1 className="text-2xl font-bold">
+                {month.toLocaleString('default', { month: 'long', year: 'numeric' })}
+            </h1>
+            <button onClick={() => shiftMonth(1)} className="text-gray-400 hover:text-gray-200">&gt;</button>
+        </div>
+        <ul className="space-y-2">
+            {events.map(event => (
+                <li key={event.id} className="text-sm">
+                    <span className="text-gray-400 mr-2">{event.event_date}</span>
+                    {event.event_name}
+                </li>
+            ))}
+        </ul>
     </div>
     );
 }
@@ -1,21 +1,28 @@
 import React, { useEffect, useState } from 'react';
 import axios from 'axios';
 
+const PAGE_SIZE = 20;
+
 function NewsService() {
   const [news, setNews] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState(null);
 
-  useEffect(() => {
-    axios.get('http://127.0.0.1:8000/api/news')
+  const loadPage = (cursor) => {
+    axios.get('http://127.0.0.1:8000/api/news', { params: { limit: PAGE_SIZE, cursor } })
       .then(response => {
-        setNews(response.data);
+        setNews(previous => cursor ? [...previous, ...response.data] : response.data);
+        setNextCursor(response.headers['x-next-cursor'] || null);
         setLoading(false);
-        console.log("News data:", response.data);
       })
       .catch(error => {
         console.error("Error fetching news data:", error);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    loadPage(null);
   }, []);
 
   return (
@@ -33,6 +40,11 @@ function NewsService() {
               <a href={article.link} target="_blank" rel="noopener noreferrer" className="text-blue-400 hover:underline mt-2 inline-block">Read more</a>
             </div>
           ))}
+          {nextCursor && (
+            <button onClick={() => loadPage(nextCursor)} className="text-blue-400 hover:underline text-sm">
+              Load more
+            </button>
+          )}
         </div>
       )}
     </div>
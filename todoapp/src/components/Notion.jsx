@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { motion } from 'framer-motion';
 import { Calendar, Clock, Info } from 'react-feather';
+import { subscribe } from '../stream';
 
 const NotionEvent = ({ event, index }) => {
   const [isExpanded, setIsExpanded] = useState(false);
@@ -37,12 +38,12 @@ const NotionEvent = ({ event, index }) => {
   );
 };
 
-const Notion = () => {
-  const [events, setEvents] = useState([]);
-  const [loading, setLoading] = useState(true);
+const Notion = ({ initialEvents }) => {
+  const [events, setEvents] = useState(initialEvents || []);
+  const [loading, setLoading] = useState(!initialEvents);
 
-  useEffect(() => {
-    fetch('http://localhost:8000/api/events')
+  const loadEvents = () => {
+    fetch('http://localhost:8000/api/events/upcoming?n=20')
       .then(response => response.json())
       .then(data => {
         setEvents(data);
@@ -52,6 +53,17 @@ const Notion = () => {
         console.error('Error fetching Notion events:', error);
         setLoading(false);
       });
+  };
+
+  useEffect(() => {
+    if (initialEvents) return;
+    loadEvents();
+  }, [initialEvents]);
+
+  // Reload only when the server says the events changed
+  useEffect(() => {
+    const unsubscribers = [subscribe('events.changed', loadEvents), subscribe('reset', loadEvents)];
+    return () => unsubscribers.forEach(unsubscribe => unsubscribe());
   }, []);
 
   if (loading) {
@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { subscribe } from '../stream';
 import { motion, AnimatePresence } from 'framer-motion';
 import { CheckCircle, Circle, Flag, Calendar, X } from 'react-feather';
 
@@ -61,11 +62,13 @@ const TaskItem = ({ task, onComplete, onDelete }) => {
   );
 };
 
-const Todoist = () => {
-  const [tasks, setTasks] = useState([]);
-  const [loading, setLoading] = useState(true);
+const Todoist = ({ initialTasks }) => {
+  const [tasks, setTasks] = useState(initialTasks || []);
+  const [loading, setLoading] = useState(!initialTasks);
 
   useEffect(() => {
+    // The dashboard snapshot already brought the tasks along
+    if (initialTasks) return;
     fetch('http://localhost:8000/api/tasks')
       .then(response => response.json())
       .then(data => {
@@ -76,7 +79,7 @@ const Todoist = () => {
         console.error('Error fetching Todoist tasks:', error);
         setLoading(false);
       });
-  }, []);
+  }, [initialTasks]);
 
   const handleComplete = (taskId) => {
     fetch(`http://localhost:8000/api/todoist/remove/${taskId}`, { method: 'POST' })
@@ -109,6 +112,25 @@ const Todoist = () => {
         setLoading(false);
       });
   };
+
+  // Apply task deltas pushed by the server instead of refetching the list
+  useEffect(() => {
+    const sameId = (a, b) => String(a) === String(b);
+    const upsert = (task) => setTasks(current =>
+      current.some(item => sameId(item.id, task.id))
+        ? current.map(item => sameId(item.id, task.id) ? task : item)
+        : [...current, task]
+    );
+    const unsubscribers = [
+      subscribe('task.added', upsert),
+      subscribe('task.updated', upsert),
+      subscribe('task.closed', ({ id }) => setTasks(current => current.filter(task => !sameId(task.id, id)))),
+      subscribe('tasks.reset', handleRefresh),
+      subscribe('reset', handleRefresh),
+    ];
+    return () => unsubscribers.forEach(unsubscribe => unsubscribe());
+  }, []);
+
   if (loading) {
     return (
       <div className="flex justify-center items-center h-full">
@@ -0,0 +1,13 @@
+// One EventSource to /api/stream shared by all components. The browser
+// reconnects on its own and sends Last-Event-ID, so missed deltas are replayed.
+let source = null;
+
+// Calls handler(data) for every event of the given type; returns an unsubscribe function
+export const subscribe = (type, handler) => {
+  if (!source) {
+    source = new EventSource('http://localhost:8000/api/stream');
+  }
+  const listener = (event) => handler(JSON.parse(event.data));
+  source.addEventListener(type, listener);
+  return () => source.removeEventListener(type, listener);
+};
@@ -1,8 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
 import os
 from dotenv import load_dotenv
 
+from APIs.http_client import get_sync_client
+
 # Load environment variables
 load_dotenv()
 
@@ -20,8 +21,8 @@ HEADERS = {
 }
 
 def fetch_daily_article_link():
-    # Send a GET request to Medium's dashboard
-    response = requests.get(MEDIUM_HOME_URL, headers=HEADERS)
+    # Send a GET request to Medium's dashboard, through the shared upstream cache
+    response = get_sync_client().get(MEDIUM_HOME_URL, headers=HEADERS)
     
     # Check if the request was successful
     if response.status_code != 200:
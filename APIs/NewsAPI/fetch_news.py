@@ -1,13 +1,75 @@
-import requests
 import os
+import gc
+import time
+import hashlib
+import logging
+import threading
 from dotenv import load_dotenv
-from newsapi import NewsApiClient
-from bs4 import BeautifulSoup
-from transformers import pipeline
+
+from APIs.http_client import get_client, get_sync_client
+from APIs.NewsAPI.summarization import LengthAwareSummarizer
 
 # Load environment variables
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+SUMMARIZER_MODEL = "Falconsai/text_summarization"
+SUMMARY_BATCH_SIZE = int(os.getenv('SUMMARY_BATCH_SIZE', 8))
+# Cut model inputs at SUMMARY_MAX_INPUT_TOKENS (default: the model's own limit); with "false"
+# an overlong input fails its batch instead. The length routing keeps inputs below the limit anyway
+SUMMARY_TRUNCATION = os.getenv('SUMMARY_TRUNCATION', 'true').lower() not in ('false', '0', 'no')
+SUMMARY_MAX_INPUT_TOKENS = int(os.getenv('SUMMARY_MAX_INPUT_TOKENS', 0)) or None
+
+# The summarization pipeline is expensive to load, so one instance is shared by the whole process.
+# transformers itself is imported on first use too: importing it alone takes seconds
+_summarizer = None
+_summarizer_lock = threading.Lock()
+# Its tokenizer, loaded on its own so routing short texts never loads the model
+_tokenizer = None
+
+
+def get_summarizer():
+    global _summarizer
+    with _summarizer_lock:
+        if _summarizer is None:
+            from transformers import pipeline
+            _summarizer = pipeline("summarization", model=SUMMARIZER_MODEL)
+            if SUMMARY_MAX_INPUT_TOKENS:
+                # The pipeline truncates to the tokenizer's limit
+                _summarizer.tokenizer.model_max_length = SUMMARY_MAX_INPUT_TOKENS
+        return _summarizer
+
+
+def get_tokenizer():
+    global _tokenizer
+    with _summarizer_lock:
+        if _tokenizer is None:
+            from transformers import AutoTokenizer
+            _tokenizer = AutoTokenizer.from_pretrained(SUMMARIZER_MODEL)
+        return _tokenizer
+
+
+def count_tokens(text):
+    return len(get_tokenizer().encode(text, add_special_tokens=False))
+
+
+def release_summarizer():
+    """Drop the shared pipeline and tokenizer so their memory is freed; returns whether one was loaded."""
+    global _summarizer, _tokenizer
+    with _summarizer_lock:
+        if _summarizer is None and _tokenizer is None:
+            return False
+        _summarizer = None
+        _tokenizer = None
+    gc.collect()
+    return True
+
+
+def text_hash(text):
+    """Key under which the summary of a cleaned article text is cached."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
 # News API Client Class (entferne doppelte Definition)
 class NewsApiClient: 
     def __init__(self): 
@@ -17,15 +79,15 @@ class NewsApiClient:
     def get_top_5_articles(self, country='us', category='general', page_size=5):
         try:
             url = f"https://newsapi.org/v2/top-headlines?country={country}&category={category}&pageSize={page_size}&apiKey={self.api_key}"
-            response = requests.get(url)
+            response = get_sync_client().get(url)
             articles = response.json()['articles']  
             status = response.json()['status']  
             if status == "ok":
                 return articles 
             else:
                 return []   
-        except Exception as e:
-            print(f"Error fetching articles: {e}")
+        except Exception:
+            logger.exception("Error fetching articles")
             return []   
         
     def cleanup_articles(self, articles):
@@ -42,29 +104,78 @@ class TagesSchaueClient:
     def __init__(self): 
         self.api_key = os.getenv('TAGES_SCHAU_API_KEY')
         self.tagesschau_api = "https://tagesschau.de/api2u/homepage"
-        self.summerizer = pipeline("summarization", model="Falconsai/text_summarization")
+
+    @property
+    def summerizer(self):
+        return get_summarizer()
+
     def get_articles(self):
         try:
-            response = requests.get(self.tagesschau_api)
+            response = get_sync_client().get(self.tagesschau_api)
             articles = response.json().get('news', [])  # Safely get 'news' key
             return articles
-        except Exception as e:
-            print(f"Error fetching articles: {e}")
+        except Exception:
+            logger.exception("Error fetching articles")
             return []
     
+    async def async_get_articles(self, client=None):
+        """Async ``get_articles`` over the shared HTTP client, or ``client`` if given.
+
+        Unlike ``get_articles`` it raises when the fetch fails, so an outage is
+        never stored as a refresh that found no articles.
+        """
+        response = await (client or get_client()).get(self.tagesschau_api)
+        response.raise_for_status()
+        return response.json().get('news', [])
+
     def clean_html(self, text):
         # Entfernen von HTML-Markup und leeren Zeichen
+        from bs4 import BeautifulSoup
         return BeautifulSoup(text, "html.parser").get_text()
 
     def summarize_articles(self, article):
         # Summarize article using pipeline
-        summary = self.summerizer(article)
-        print("--------------------------------------------")
-        print(summary)
-        print("--------------------------------------------")
+        summary = self.summerizer(article, truncation=SUMMARY_TRUNCATION)
         return summary
 
-    def cleanup_articles(self, articles):
+    def summarize_batch(self, texts, batch_size=SUMMARY_BATCH_SIZE, stats=None):
+        """Summarize many texts, returning one summary per text.
+
+        Texts are routed by length (see APIs.NewsAPI.summarization), and each
+        tier goes through the model as one batch. ``stats``, a list, receives
+        ("batch_seconds", tier, seconds) for every model call and ("texts",
+        tier, 1) for every text, for the worker to hand to the API's metrics.
+        """
+        if not texts:
+            return []
+
+        def generate(batch, tier, lengths):
+            if not batch:
+                return []
+            started = time.perf_counter()
+            summaries = self.summerizer(batch, batch_size=batch_size, truncation=SUMMARY_TRUNCATION, **lengths)
+            if stats is not None:
+                stats.append(("batch_seconds", tier, time.perf_counter() - started))
+            return [summary['summary_text'] for summary in summaries]
+
+        summaries, tiers = LengthAwareSummarizer(generate, count_tokens).summarize(texts)
+        if stats is not None:
+            stats.extend(("texts", tier, 1) for tier in tiers)
+        return summaries
+
+    def cleanup_articles(self, articles, summary_lookup=None):
+        """Clean the raw articles and summarize their text.
+
+        ``summary_lookup`` maps a list of text hashes to the summaries already
+        known for them; only the remaining texts go through the model.
+        """
+        cleaned_articles = self.clean_articles(articles)
+        summaries, pending = self.known_summaries(cleaned_articles, summary_lookup)
+        summaries.update(zip(pending, self.summarize_batch(list(pending.values()))))
+        return self.apply_summaries(cleaned_articles, summaries)
+
+    def clean_articles(self, articles):
+        """The raw articles as dicts with their plain ``text_content``, not yet summarized."""
         cleaned_articles = []
         for article in articles:
             title = article.get('title', 'No title')
@@ -78,16 +189,33 @@ class TagesSchaueClient:
 
             text_content = self.clean_html(text_content)    
 
-            ## summarize article
-            summary = self.summarize_articles(text_content)
             cleaned_articles.append({
+                # sourceId is stable across refreshes; the link is the fallback identity
+                'source_id': str(article.get('sourceId') or link),
                 'title': title,
                 'date': date,
                 'link': link,
-                'text_content': summary[0]['summary_text']
+                'text_hash': text_hash(text_content),
+                'content_hash': text_hash("\x1f".join((title, date, link, text_content))),
+                'text_content': text_content,
             })
 
+        return cleaned_articles
+
+    def known_summaries(self, cleaned_articles, summary_lookup=None):
+        """Split into (text hash -> known summary, text hash -> text still to summarize)."""
+        hashes = [article['text_hash'] for article in cleaned_articles]
+        summaries = dict(summary_lookup(hashes)) if summary_lookup else {}
+        pending = {}
+        for article in cleaned_articles:
+            if article['text_hash'] not in summaries and article['text_content'].strip():
+                pending.setdefault(article['text_hash'], article['text_content'])
+        return summaries, pending
 
+    def apply_summaries(self, cleaned_articles, summaries):
+        """Replace each text with its summary, or "" while it has none."""
+        for article in cleaned_articles:
+            article['text_content'] = summaries.get(article['text_hash'], "")
         return cleaned_articles
 
 
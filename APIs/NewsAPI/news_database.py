@@ -0,0 +1,369 @@
+import os
+import queue
+import re
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+# Absolute so the database does not depend on the working directory
+DATABASE_PATH = os.getenv(
+    'NEWS_DB_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'news.db'),
+)
+# Articles published longer ago than this are pruned on each refresh
+NEWS_RETENTION_DAYS = int(os.getenv('NEWS_RETENTION_DAYS', 7))
+# Connections shared by the threads that query news.db (asyncio.to_thread's executor, up to
+# min(32, CPUs + 4) threads); queries are short, so more threads than this briefly wait for one
+POOL_SIZE = int(os.getenv('NEWS_DB_POOL_SIZE', 8))
+UPDATE_INTERVAL = timedelta(days=1)
+# A claimed summary job whose worker has not finished it after this long is handed out again
+SUMMARY_CLAIM_TIMEOUT = timedelta(seconds=int(os.getenv('SUMMARY_CLAIM_TIMEOUT_SECONDS', 900)))
+# Jobs failing this often stay failed until the next refresh enqueues them again
+SUMMARY_MAX_ATTEMPTS = int(os.getenv('SUMMARY_MAX_ATTEMPTS', 3))
+
+
+def published_at(date):
+    """Normalize a Tagesschau date to a sortable UTC timestamp, falling back to now."""
+    try:
+        parsed = datetime.fromisoformat(date)
+    except (TypeError, ValueError):
+        parsed = datetime.now(timezone.utc)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def fts_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    terms = re.findall(r"\w+", text)
+    return " ".join('"' + term + '"*' for term in terms)
+
+
+class ConnectionPool:
+    """A fixed-size pool of SQLite connections shared between threads.
+
+    Connections are opened lazily, in WAL mode, so readers keep working on the
+    last committed snapshot while the refresh job writes.
+    """
+    def __init__(self, path, size=POOL_SIZE):
+        self.path = path
+        self.size = size
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._opened < self.size
+                if can_open:
+                    self._opened += 1
+            if can_open:
+                try:
+                    conn = self._open()
+                except Exception:
+                    with self._lock:
+                        self._opened -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+class NewsDatabase:
+    """Data access for news.db: articles, their full-text index, cached summaries
+    and the queue of texts waiting for the summarization worker."""
+    def __init__(self, path=DATABASE_PATH, pool_size=POOL_SIZE):
+        self.pool = ConnectionPool(path, pool_size)
+        # Mirrors the last_update table so requests never have to query it
+        self.last_update = None
+
+    def create_schema(self):
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            # Databases from before articles were keyed on source_id are rebuilt on the next refresh
+            columns = [row[1] for row in cursor.execute("PRAGMA table_info(articles)")]
+            if columns and 'source_id' not in columns:
+                cursor.execute("DROP TABLE articles")
+                cursor.execute("DROP TABLE IF EXISTS articles_fts")
+                cursor.execute("DROP TABLE IF EXISTS last_update")
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS articles (
+                source_id TEXT PRIMARY KEY,
+                title TEXT,
+                date TEXT,
+                published_at TEXT,
+                text_content TEXT,
+                link TEXT,
+                content_hash TEXT,
+                text_hash TEXT
+            )
+            ''')
+            # Summaries are written back by the worker, which only knows the text they belong to
+            if 'text_hash' not in [row[1] for row in cursor.execute("PRAGMA table_info(articles)")]:
+                cursor.execute("ALTER TABLE articles ADD COLUMN text_hash TEXT")
+            cursor.execute("CREATE INDEX IF NOT EXISTS articles_published_at ON articles (published_at, source_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS articles_text_hash ON articles (text_hash)")
+            # Full-text index over titles and summaries, kept in sync with articles by triggers
+            fts_exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'articles_fts'").fetchone()
+            cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5(
+                title, text_content, content='articles', content_rowid='rowid'
+            )
+            ''')
+            cursor.executescript('''
+            CREATE TRIGGER IF NOT EXISTS articles_fts_insert AFTER INSERT ON articles BEGIN
+                INSERT INTO articles_fts (rowid, title, text_content) VALUES (new.rowid, new.title, new.text_content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_delete AFTER DELETE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, text_content) VALUES ('delete', old.rowid, old.title, old.text_content);
+            END;
+            CREATE TRIGGER IF NOT EXISTS articles_fts_update AFTER UPDATE ON articles BEGIN
+                INSERT INTO articles_fts (articles_fts, rowid, title, text_content) VALUES ('delete', old.rowid, old.title, old.text_content);
+                INSERT INTO articles_fts (rowid, title, text_content) VALUES (new.rowid, new.title, new.text_content);
+            END;
+            ''')
+            if not fts_exists:
+                cursor.execute("INSERT INTO articles_fts (articles_fts) VALUES ('rebuild')")
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summaries (
+                text_hash TEXT PRIMARY KEY,
+                summary TEXT
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_jobs (
+                text_hash TEXT PRIMARY KEY,
+                text TEXT,
+                state TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at TEXT,
+                claimed_at TEXT,
+                error TEXT
+            )
+            ''')
+            # Timings the worker process records for the API's metrics, until the API reads them
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS summary_stats (
+                id INTEGER PRIMARY KEY,
+                metric TEXT,
+                tier TEXT,
+                value REAL
+            )
+            ''')
+            cursor.execute('''
+            CREATE TABLE IF NOT EXISTS last_update (
+                id INTEGER PRIMARY KEY,
+                timestamp TEXT
+            )
+            ''')
+            conn.commit()
+            result = cursor.execute("SELECT timestamp FROM last_update").fetchone()
+            self.last_update = result[0] if result else None
+
+    def is_update_needed(self):
+        if self.last_update is None:
+            return True
+        return datetime.now() - datetime.fromisoformat(self.last_update) > UPDATE_INTERVAL
+
+    def insert_articles(self, articles):
+        """Upsert the articles of one refresh in a single transaction.
+
+        Rows whose content hash is unchanged are left alone, and readers only
+        ever see the previous or the complete new batch.
+        """
+        timestamp = datetime.now().isoformat()
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO summaries (text_hash, summary) VALUES (?, ?)",
+                                 [(article['text_hash'], article['text_content']) for article in articles if article['text_content']])
+                conn.executemany('''
+                INSERT INTO articles (source_id, title, date, published_at, text_content, link, content_hash, text_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (source_id) DO UPDATE SET
+                    title = excluded.title,
+                    date = excluded.date,
+                    published_at = excluded.published_at,
+                    text_content = excluded.text_content,
+                    link = excluded.link,
+                    content_hash = excluded.content_hash,
+                    text_hash = excluded.text_hash
+                WHERE articles.content_hash IS NOT excluded.content_hash
+                ''', [(article['source_id'], article['title'], article['date'], published_at(article['date']),
+                       article['text_content'], article['link'], article['content_hash'], article['text_hash'])
+                      for article in articles])
+                cutoff = datetime.now(timezone.utc) - timedelta(days=NEWS_RETENTION_DAYS)
+                conn.execute("DELETE FROM articles WHERE published_at < ?", (cutoff.isoformat(),))
+                conn.execute("DELETE FROM last_update")
+                conn.execute("INSERT INTO last_update (timestamp) VALUES (?)", (timestamp,))
+        self.last_update = timestamp
+
+    def get_cached_summaries(self, text_hashes):
+        placeholders = ", ".join("?" for _ in text_hashes)
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT text_hash, summary FROM summaries WHERE text_hash IN ({placeholders})",
+                                list(text_hashes)).fetchall()
+        return dict(rows)
+
+    def enqueue_summaries(self, texts):
+        """Queue ``texts`` (text hash -> text) for the worker; failed jobs start over."""
+        now = datetime.now().isoformat()
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany('''
+                INSERT INTO summary_jobs (text_hash, text, state, attempts, enqueued_at) VALUES (?, ?, 'pending', 0, ?)
+                ON CONFLICT (text_hash) DO UPDATE SET state = 'pending', attempts = 0, error = NULL
+                WHERE summary_jobs.state = 'failed'
+                ''', [(text_hash, text, now) for text_hash, text in texts.items()])
+
+    def claim_summary_jobs(self, limit):
+        """Take up to ``limit`` jobs, oldest first, as (text hash, text) pairs.
+
+        One UPDATE ... RETURNING claims them, so concurrent workers never get
+        the same job. Jobs of a worker that died are reclaimed after
+        ``SUMMARY_CLAIM_TIMEOUT``.
+        """
+        now = datetime.now()
+        stale = (now - SUMMARY_CLAIM_TIMEOUT).isoformat()
+        with self.pool.connection() as conn:
+            with conn:
+                # A text that keeps killing its worker must not be handed out forever
+                conn.execute('''
+                UPDATE summary_jobs SET state = 'failed', error = 'Worker did not finish the job'
+                WHERE state = 'running' AND claimed_at < ? AND attempts >= ?
+                ''', (stale, SUMMARY_MAX_ATTEMPTS))
+                rows = conn.execute('''
+                UPDATE summary_jobs SET state = 'running', claimed_at = ?, attempts = attempts + 1
+                WHERE text_hash IN (
+                    SELECT text_hash FROM summary_jobs
+                    WHERE state = 'pending' OR (state = 'running' AND claimed_at < ?)
+                    ORDER BY enqueued_at LIMIT ?
+                )
+                RETURNING text_hash, text
+                ''', (now.isoformat(), stale, limit)).fetchall()
+        return rows
+
+    def complete_summary_jobs(self, summaries, stats=()):
+        """Store finished summaries, put them into their articles and drop the jobs, in one transaction.
+
+        ``stats`` are the batch's (metric, tier, value) rows for the API's metrics.
+        """
+        summaries = list(summaries)
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO summaries (text_hash, summary) VALUES (?, ?)", summaries)
+                conn.executemany("UPDATE articles SET text_content = ? WHERE text_hash = ?",
+                                 [(summary, text_hash) for text_hash, summary in summaries])
+                conn.executemany("DELETE FROM summary_jobs WHERE text_hash = ?",
+                                 [(text_hash,) for text_hash, _ in summaries])
+                conn.executemany("INSERT INTO summary_stats (metric, tier, value) VALUES (?, ?, ?)", stats)
+
+    def drain_summary_stats(self):
+        """Take the (metric, tier, value) rows the worker recorded since the last call."""
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute("DELETE FROM summary_stats RETURNING metric, tier, value").fetchall()
+
+    def release_summary_jobs(self):
+        """Hand every claimed job back to the queue, for when no worker can still be holding it.
+
+        The claim does not count as an attempt: the worker was stopped, the text did not fail.
+        """
+        with self.pool.connection() as conn:
+            with conn:
+                return conn.execute('''
+                UPDATE summary_jobs SET state = 'pending', claimed_at = NULL, attempts = MAX(attempts - 1, 0)
+                WHERE state = 'running'
+                ''').rowcount
+
+    def fail_summary_jobs(self, text_hashes, error):
+        """Return jobs to the queue, or mark them failed once they used up their attempts."""
+        with self.pool.connection() as conn:
+            with conn:
+                conn.executemany('''
+                UPDATE summary_jobs SET state = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                    claimed_at = NULL, error = ?
+                WHERE text_hash = ?
+                ''', [(SUMMARY_MAX_ATTEMPTS, error, text_hash) for text_hash in text_hashes])
+
+    def summary_job_counts(self):
+        with self.pool.connection() as conn:
+            rows = conn.execute("SELECT state, COUNT(*) FROM summary_jobs GROUP BY state").fetchall()
+        return {"pending": 0, "running": 0, "failed": 0, **dict(rows)}
+
+    def get_articles(self, limit=None, after=None):
+        """Articles newest first; returns the page and the key to continue after.
+
+        Pages are keyed on (published_at, source_id) rather than an offset, so
+        each page is an index range scan however deep the reader goes.
+        """
+        query = "SELECT title, date, text_content, link, published_at, source_id FROM articles"
+        params = []
+        if after:
+            query += " WHERE (published_at, source_id) < (?, ?)"
+            params.extend(after)
+        query += " ORDER BY published_at DESC, source_id DESC"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit + 1)
+        with self.pool.connection() as conn:
+            rows = conn.execute(query, params).fetchall()
+        next_key = None
+        if limit and len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1][4], rows[-1][5])
+        articles = [{"title": row[0], "date": row[1], "text_content": row[2], "link": row[3]} for row in rows]
+        return articles, next_key
+
+    def search_articles(self, q, limit, after=None):
+        """Articles matching ``q``, best bm25 rank first, paged with a (rank, rowid) keyset."""
+        query = fts_query(q)
+        if not query:
+            return [], None
+        params = [query]
+        sql = '''
+        SELECT * FROM (
+            SELECT a.title, a.date, a.text_content, a.link, bm25(articles_fts) AS score, a.rowid AS row
+            FROM articles_fts JOIN articles a ON a.rowid = articles_fts.rowid
+            WHERE articles_fts MATCH ?
+        )
+        '''
+        if after:
+            score, row = after
+            sql += " WHERE score > ? OR (score = ? AND row > ?)"
+            params.extend([score, score, row])
+        sql += " ORDER BY score, row LIMIT ?"
+        params.append(limit + 1)
+        with self.pool.connection() as conn:
+            rows = conn.execute(sql, params).fetchall()
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1][4], rows[-1][5])
+        articles = [{"title": row[0], "date": row[1], "text_content": row[2], "link": row[3]} for row in rows]
+        return articles, next_key
@@ -0,0 +1,153 @@
+import os
+import re
+from collections import Counter
+
+# Texts up to this many tokens are condensed extractively, without the model
+SHORT_TOKENS = int(os.getenv('SUMMARY_SHORT_TOKENS', 80))
+# Longest input given to the model in one piece; below the 512-token context of the default model
+CHUNK_TOKENS = int(os.getenv('SUMMARY_CHUNK_TOKENS', 480))
+# Generated summary length in tokens for each kind of model call
+GENERATION = {
+    # a whole text that fits the context
+    "direct": {"max_length": 120, "min_length": 30},
+    # one chunk of a long text (map)
+    "chunk": {"max_length": 80, "min_length": 20},
+    # the joined chunk summaries of a long text (reduce)
+    "reduce": {"max_length": 160, "min_length": 50},
+}
+# A summary is never asked to be longer than this share of its input, so short inputs
+# (e.g. the joined summaries of two chunks) are not padded up to min_length
+MIN_LENGTH_RATIO = 0.5
+# Clamped min_lengths are rounded down to this step, so one batch holds many texts
+MIN_LENGTH_STEP = 10
+# Map rounds before the chunk summaries of a very long text are reduced, truncated if need be
+MAX_MAP_ROUNDS = 3
+EXTRACTIVE_SENTENCES = 2
+
+SENTENCE_END = re.compile(r'(?<=[.!?])\s+')
+WORD = re.compile(r'\w+')
+
+
+def split_sentences(text):
+    return [sentence for sentence in SENTENCE_END.split(text.strip()) if sentence]
+
+
+def extractive_summary(text, max_sentences=EXTRACTIVE_SENTENCES):
+    """The ``max_sentences`` sentences richest in the text's frequent words, in their original order."""
+    sentences = split_sentences(text)
+    if len(sentences) <= max_sentences:
+        return text.strip()
+    frequencies = Counter(word.lower() for word in WORD.findall(text) if len(word) > 3)
+
+    def score(sentence):
+        words = [word.lower() for word in WORD.findall(sentence) if len(word) > 3]
+        return sum(frequencies[word] for word in words) / (len(words) or 1)
+
+    # Ties go to the earlier sentence, news put the gist first
+    best = sorted(range(len(sentences)), key=lambda i: (-score(sentences[i]), i))[:max_sentences]
+    return " ".join(sentences[i] for i in sorted(best))
+
+
+def generation_lengths(tier, tokens):
+    """``GENERATION[tier]`` with min_length clamped for an input of ``tokens`` tokens."""
+    lengths = dict(GENERATION[tier])
+    clamped = int(tokens * MIN_LENGTH_RATIO) // MIN_LENGTH_STEP * MIN_LENGTH_STEP
+    lengths["min_length"] = min(lengths["min_length"], clamped)
+    return lengths
+
+
+def chunk_text(text, count_tokens, limit=CHUNK_TOKENS):
+    """Split ``text`` at sentence boundaries into pieces of at most ``limit`` tokens."""
+    chunks, current, current_tokens = [], [], 0
+    for sentence in split_sentences(text):
+        tokens = count_tokens(sentence)
+        if tokens > limit:
+            # A sentence longer than a chunk is cut at word boundaries
+            words = sentence.split()
+            step = max(len(words) * limit // tokens, 1)
+            pieces = [" ".join(words[i:i + step]) for i in range(0, len(words), step)]
+        else:
+            pieces = [sentence]
+        for piece in pieces:
+            piece_tokens = tokens if piece is sentence else count_tokens(piece)
+            if current and current_tokens + piece_tokens > limit:
+                chunks.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+class LengthAwareSummarizer:
+    """Routes every text by its token count.
+
+    Short texts get an extractive summary and never reach the model. Texts
+    that fit the context are summarized directly. Long texts are split into
+    chunks; the chunks of all long texts are summarized as one batch (map)
+    and each text's chunk summaries are summarized again (reduce), so the
+    whole article is covered instead of its first 512 tokens.
+    ``generate(texts, tier, lengths)`` runs one batch through the model with
+    ``lengths``, the max_length/min_length of ``generation_lengths``; texts
+    of a tier are batched by their lengths.
+    """
+    def __init__(self, generate, count_tokens, short_tokens=SHORT_TOKENS, chunk_tokens=CHUNK_TOKENS):
+        self.generate = generate
+        self.count_tokens = count_tokens
+        self.short_tokens = short_tokens
+        self.chunk_tokens = chunk_tokens
+
+    def route(self, tokens):
+        if tokens <= self.short_tokens:
+            return "extractive"
+        if tokens <= self.chunk_tokens:
+            return "direct"
+        return "long"
+
+    def _generate(self, texts, tier):
+        """One summary per text, batched by the generation lengths each text gets."""
+        groups = {}
+        for i, text in enumerate(texts):
+            lengths = generation_lengths(tier, self.count_tokens(text))
+            groups.setdefault(tuple(sorted(lengths.items())), []).append(i)
+        summaries = [None] * len(texts)
+        for lengths, indices in groups.items():
+            for i, summary in zip(indices, self.generate([texts[i] for i in indices], tier, dict(lengths))):
+                summaries[i] = summary
+        return summaries
+
+    def summarize(self, texts):
+        """One summary per text, in order, together with the tier each text was routed to."""
+        summaries = [None] * len(texts)
+        tiers = [self.route(self.count_tokens(text)) for text in texts]
+        direct = [i for i, tier in enumerate(tiers) if tier == "direct"]
+        for i, tier in enumerate(tiers):
+            if tier == "extractive":
+                summaries[i] = extractive_summary(texts[i])
+        for i, summary in zip(direct, self._generate([texts[i] for i in direct], "direct")):
+            summaries[i] = summary
+        for i, summary in self._map_reduce({i: texts[i] for i, tier in enumerate(tiers) if tier == "long"}).items():
+            summaries[i] = summary
+        return summaries, tiers
+
+    def _map_reduce(self, long_texts):
+        pending = dict(long_texts)
+        ready = {}
+        for _ in range(MAX_MAP_ROUNDS):
+            if not pending:
+                break
+            chunks = {i: chunk_text(text, self.count_tokens, self.chunk_tokens) for i, text in pending.items()}
+            flat = [chunk for i in chunks for chunk in chunks[i]]
+            chunk_summaries = iter(self._generate(flat, "chunk"))
+            joined = {i: " ".join(next(chunk_summaries) for _ in chunks[i]) for i in chunks}
+            pending = {}
+            for i, text in joined.items():
+                if self.count_tokens(text) <= self.chunk_tokens:
+                    ready[i] = text
+                else:
+                    pending[i] = text
+        # Whatever is still too long after the last round is truncated by the model
+        ready.update(pending)
+        order = list(ready)
+        return dict(zip(order, self._generate([ready[i] for i in order], "reduce")))
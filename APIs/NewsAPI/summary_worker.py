@@ -0,0 +1,118 @@
+"""Summarization worker: runs the model outside the API process.
+
+    python -m APIs.NewsAPI.summary_worker
+
+Claims jobs from the summary_jobs table in news.db, summarizes them in
+batches and writes each batch back into the articles as it completes,
+together with its timings for the API's /metrics (summary_stats). The
+queue lives in SQLite, so jobs survive restarts of either process. After
+``SUMMARY_MODEL_IDLE_SECONDS`` without work the model is unloaded; a worker
+started by the API with ``--exit-when-idle`` also exits after that many
+seconds, which releases all of its memory.
+"""
+import os
+import sys
+import time
+import logging
+import argparse
+import subprocess
+import threading
+
+from APIs.NewsAPI.fetch_news import SUMMARY_BATCH_SIZE, TagesSchaueClient, release_summarizer
+from APIs.NewsAPI.news_database import NewsDatabase
+
+logger = logging.getLogger(__name__)
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+POLL_SECONDS = float(os.getenv('SUMMARY_WORKER_POLL_SECONDS', 2))
+MODEL_IDLE_SECONDS = float(os.getenv('SUMMARY_MODEL_IDLE_SECONDS', 300))
+# How long a worker started by the API waits for more jobs before it exits
+WORKER_IDLE_EXIT_SECONDS = float(os.getenv('SUMMARY_WORKER_IDLE_EXIT_SECONDS', 600))
+# "spawn": the API starts a worker whenever jobs are queued; "external": one is run separately
+WORKER_MODE = os.getenv('SUMMARY_WORKER_MODE', 'spawn')
+
+
+def run(db, batch_size=SUMMARY_BATCH_SIZE, exit_when_idle=None):
+    client = TagesSchaueClient()
+    last_work = time.monotonic()
+    while True:
+        jobs = db.claim_summary_jobs(batch_size)
+        if jobs:
+            hashes = [text_hash for text_hash, _ in jobs]
+            stats = []
+            try:
+                summaries = client.summarize_batch([text for _, text in jobs], stats=stats)
+            except Exception as e:
+                logger.exception(f"Error summarizing {len(jobs)} articles")
+                db.fail_summary_jobs(hashes, str(e))
+                time.sleep(POLL_SECONDS)
+                continue
+            db.complete_summary_jobs(zip(hashes, summaries), stats)
+            last_work = time.monotonic()
+            continue
+        idle = time.monotonic() - last_work
+        if idle >= MODEL_IDLE_SECONDS and release_summarizer():
+            logger.info(f"Unloaded the summarization model after {idle:.0f}s without jobs")
+        if exit_when_idle is not None and idle >= exit_when_idle:
+            return
+        time.sleep(POLL_SECONDS)
+
+
+# The worker this API process started, if any
+_process = None
+_process_lock = threading.Lock()
+
+
+def ensure_worker():
+    """Start a worker unless one started by this process is still running (or workers are external)."""
+    global _process
+    if WORKER_MODE == 'external':
+        return None
+    with _process_lock:
+        if _process is None or _process.poll() is not None:
+            _process = subprocess.Popen(
+                [sys.executable, "-m", "APIs.NewsAPI.summary_worker", "--exit-when-idle", str(WORKER_IDLE_EXIT_SECONDS)],
+                cwd=ROOT,
+            )
+        return _process
+
+
+def worker_running():
+    with _process_lock:
+        return _process is not None and _process.poll() is None
+
+
+def stop_worker(db=None):
+    """Stop the worker this process started; its claimed jobs go back to the queue of ``db``."""
+    global _process
+    with _process_lock:
+        if _process is not None and _process.poll() is None:
+            _process.terminate()
+            try:
+                _process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                _process.kill()
+                _process.wait()
+            # Otherwise they would wait out SUMMARY_CLAIM_TIMEOUT before the next worker may take them
+            if db is not None:
+                db.release_summary_jobs()
+        _process = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=SUMMARY_BATCH_SIZE)
+    parser.add_argument("--exit-when-idle", type=float, default=None, metavar="SECONDS",
+                        help="exit after this many seconds without jobs")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db = NewsDatabase(pool_size=1)
+    db.create_schema()
+    try:
+        run(db, args.batch_size, args.exit_when_idle)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
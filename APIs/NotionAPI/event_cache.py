@@ -0,0 +1,170 @@
+import os
+import heapq
+import sqlite3
+import asyncio
+import threading
+import logging
+from bisect import bisect_left
+from datetime import datetime, timedelta, timezone
+
+from .hookup_api import EventRecord
+
+logger = logging.getLogger(__name__)
+
+CACHE_PATH = os.getenv(
+    "NOTION_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "notion_events.db"),
+)
+# Database queries never return archived pages, so deletions are only noticed
+# by a full scan; this bounds how long a deleted event can linger
+FULL_SYNC_INTERVAL = timedelta(hours=int(os.getenv("NOTION_FULL_SYNC_HOURS", 6)))
+
+
+class EventIndex:
+    """Events sorted by start time, for range lookups by binary search.
+
+    An event overlaps a window if it starts before the window ends and ends
+    after it starts. Only the first condition is a prefix of the sorted list,
+    so the search also starts ``max_duration`` before the window: nothing
+    that begins earlier can still be running.
+    """
+    def __init__(self, events=()):
+        self.events = sorted(events, key=lambda event: (event.start, event.page_id))
+        self.starts = [event.start for event in self.events]
+        self.max_duration = max((event.end - event.start for event in self.events), default=timedelta(0))
+
+    def __len__(self):
+        return len(self.events)
+
+    def overlapping(self, start, end):
+        """Events overlapping the half-open window [start, end), ordered by start."""
+        earliest = start - self.max_duration if start - datetime.min > self.max_duration else datetime.min
+        lo = bisect_left(self.starts, earliest)
+        hi = bisect_left(self.starts, end)
+        return [event for event in self.events[lo:hi] if event.end >= start]
+
+    def upcoming(self, n, now=None):
+        """The next ``n`` events that have not ended yet, running ones included."""
+        now = now or datetime.now()
+        # Started before now and still running, then everything from now on
+        running = self.overlapping(now, now)
+        first_future = bisect_left(self.starts, now)
+        future = self.events[first_future:first_future + n]
+        return heapq.nsmallest(n, running + future, key=lambda event: (event.start, event.page_id))
+
+
+class NotionEventCache:
+    """Events of the Notion calendar, persisted locally.
+
+    ``sync`` only asks Notion for pages edited since the last watermark;
+    every ``FULL_SYNC_INTERVAL`` it rescans the database to drop pages that
+    were archived or deleted. ``index`` holds the same events in memory and
+    is replaced only when a sync actually changes them, and then ``on_change`` is
+    called with the ids of the changed and the removed pages.
+    """
+    def __init__(self, path=CACHE_PATH, on_change=None):
+        self.on_change = on_change
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        self.sync_lock = asyncio.Lock()
+        with self.lock, self.conn:
+            self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS events (
+                page_id TEXT PRIMARY KEY,
+                name TEXT,
+                start_date TEXT,
+                start_time TEXT,
+                end_date TEXT,
+                end_time TEXT,
+                description TEXT,
+                last_edited_time TEXT
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                watermark TEXT,
+                last_full_sync TEXT
+            );
+            ''')
+        self.index = EventIndex(self.get_events())
+
+    def _state(self):
+        with self.lock:
+            row = self.conn.execute("SELECT watermark, last_full_sync FROM sync_state WHERE id = 1").fetchone()
+        return row if row else (None, None)
+
+    @property
+    def is_synced(self):
+        return self._state()[0] is not None
+
+    async def sync(self, api, client=None):
+        """Bring the cache up to date through ``api`` (a ConnectNotionAPI).
+
+        Pages are read with ``api.async_iter_pages`` over the shared HTTP
+        client, or ``client`` if given.
+        """
+        async with self.sync_lock:
+            watermark, last_full_sync = await asyncio.to_thread(self._state)
+            full = (watermark is None or last_full_sync is None
+                    or datetime.now() - datetime.fromisoformat(last_full_sync) > FULL_SYNC_INTERVAL)
+            page_filter = None
+            if not full:
+                # Notion rounds edit times to the minute, so re-read the watermark minute itself
+                page_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": watermark}}
+
+            changed, removed, seen = [], [], set()
+            new_watermark = watermark
+            async for page in api.async_iter_pages(page_filter, client):
+                seen.add(page['id'])
+                edited = page.get('last_edited_time')
+                if edited and (new_watermark is None or edited > new_watermark):
+                    new_watermark = edited
+                event = None if page.get('archived') or page.get('in_trash') else api.parse_event(page)
+                if event is None:
+                    removed.append(page['id'])
+                else:
+                    changed.append(tuple(event) + (edited,))
+
+            # SQLite runs in the threadpool, off the event loop
+            changed, removed = await asyncio.to_thread(
+                self._store, changed, removed, seen, full, new_watermark, last_full_sync
+            )
+            if changed or removed:
+                self.index = EventIndex(await asyncio.to_thread(self.get_events))
+                if self.on_change is not None:
+                    self.on_change([event[0] for event in changed], removed)
+            return len(changed), len(removed)
+
+    def _store(self, changed, removed, seen, full, watermark, last_full_sync):
+        """Write one sync's pages; returns the rows and removals that actually changed the cache."""
+        with self.lock, self.conn:
+            stored = {row[0]: row for row in self.conn.execute("SELECT * FROM events")}
+            # The watermark minute comes back on every sync; only rows that differ count as changes
+            changed = [row for row in changed if stored.get(row[0]) != row]
+            removed = [page_id for page_id in removed if page_id in stored]
+            if full:
+                removed.extend(stored.keys() - seen)
+            self.conn.executemany("DELETE FROM events WHERE page_id = ?", [(page_id,) for page_id in removed])
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", changed
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (id, watermark, last_full_sync) VALUES (1, ?, ?)",
+                (watermark or datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+                 datetime.now().isoformat() if full else last_full_sync),
+            )
+        return changed, removed
+
+    async def sync_quietly(self, api_factory, client=None):
+        """Scheduler job: sync with a fresh API client, logging instead of raising."""
+        try:
+            await self.sync(api_factory(), client)
+        except Exception:
+            logger.exception("Error syncing Notion events")
+
+    def get_events(self) -> list[EventRecord]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT page_id, name, start_date, start_time, end_date, end_time, description "
+                "FROM events ORDER BY start_date, start_time, page_id"
+            ).fetchall()
+        return [EventRecord(*row) for row in rows]
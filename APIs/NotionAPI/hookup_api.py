@@ -1,11 +1,44 @@
-from notion_client import Client
 import os 
 from dotenv import load_dotenv
-import requests
-import json 
 import re 
-from itertools import zip_longest
+from datetime import datetime
+from typing import NamedTuple
+
+from APIs.http_client import get_client, get_sync_client
 load_dotenv()
+
+# Notion's maximum page size for database queries
+PAGE_SIZE = 100
+DATE_PATTERN = re.compile(r'\d{4}-\d{2}-\d{2}')
+TIME_PATTERN = re.compile(r'\d{2}:\d{2}')
+
+
+class EventRecord(NamedTuple):
+    page_id: str
+    name: str
+    start_date: str
+    start_time: str
+    end_date: str
+    end_time: str
+    description: str
+
+    @property
+    def start(self):
+        """Start as a naive local datetime, the wall-clock time shown in Notion."""
+        return datetime.fromisoformat(f"{self.start_date}T{self.start_time}")
+
+    @property
+    def end(self):
+        # Never before the start, so malformed ranges still sort and overlap sanely
+        return max(self.start, datetime.fromisoformat(f"{self.end_date}T{self.end_time}"))
+
+    @property
+    def date_label(self):
+        if self.start_date == self.end_date:
+            return f"{self.start_date} {self.start_time} - {self.end_time}"
+        return f"{self.start_date} {self.start_time} to {self.end_date} {self.end_time}"
+
+
 class ConnectNotionAPI:
     ## For no this has calendar and other tasks, 
     # but in the future it will be
@@ -18,113 +51,92 @@ class ConnectNotionAPI:
             "Content-Type": "application/json", 
             "Notion-Version": "2022-06-28"
         }
-        self.client = Client(auth=self.token)
-        
+
+    @property
+    def query_url(self):
+        return f"https://api.notion.com/v1/databases/{self.database_id}/query"
+
+    def query_payload(self, filter=None):
+        payload = {"page_size": PAGE_SIZE}
+        if filter:
+            payload["filter"] = filter
+        return payload
+
+    def iter_pages(self, filter=None):
+        """Yield every page of the database, following ``next_cursor`` lazily."""
+        url = self.query_url
+        payload = self.query_payload(filter)
+        while True:
+            response = get_sync_client().post(url, json=payload, headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            yield from data['results']
+            if not data.get('has_more') or not data.get('next_cursor'):
+                break
+            payload["start_cursor"] = data['next_cursor']
+
+    async def async_iter_pages(self, filter=None, client=None):
+        """Async ``iter_pages`` over the shared HTTP client, or ``client`` if given."""
+        client = client or get_client()
+        payload = self.query_payload(filter)
+        while True:
+            response = await client.post(self.query_url, json=payload, headers=self.headers)
+            response.raise_for_status()
+            data = response.json()
+            for page in data['results']:
+                yield page
+            if not data.get('has_more') or not data.get('next_cursor'):
+                break
+            payload["start_cursor"] = data['next_cursor']
+
     def get_pages(self):
+        return list(self.iter_pages())
 
-        url = f"https://api.notion.com/v1/databases/{self.database_id}/query"
-        payload = {"page_size": 100}  
-        response = requests.post(url, json=payload, headers=self.headers)
-        data = response.json()
-        return data['results']
-
-
-    def extract_event_name(self, page):
-        
-        list_content = []   
-        for item in page:   
-            content = item['properties']["Action"]['title'] 
-            if content == []:
-                print("skipped empty")
-
-                continue
-            
-            else :
-                list_content.append(content[0]['plain_text'])
-    
-        return list_content
-    
-    def extract_event_date(self, page):
-        list_of_dates = [] 
-        try: 
-            for item in page:
-                # Check if 'Date' field exists
-                content = item.get('properties', {}).get('Date', {}).get('date', None)
-                if content is None:
-                    print("skipped empty")
-                    continue
-                
-                # Extract start date and time
-                start_content = content.get('start', '')
-                start_date = re.search(r'\d{4}-\d{2}-\d{2}', start_content)
-                start_time = re.search(r'\d{2}:\d{2}', start_content)
-                
-                # Set default times if not present
-                start_time = start_time.group(0) if start_time else "00:00"
-                
-                # Extract end date and time
-                end_content = content.get('end', '')
-                end_date = re.search(r'\d{4}-\d{2}-\d{2}', end_content)
-                end_time = re.search(r'\d{2}:\d{2}', end_content)
-                
-                # Set default end time
-                end_time = end_time.group(0) if end_time else "23:59"
-                
-                # Handle case where start and end dates are the same or different
-                if start_date and end_date and start_date.group(0) == end_date.group(0):
-                    list_of_dates.append((start_date.group(0), start_time, end_time))
-                elif start_date and end_date:
-                    list_of_dates.append((start_date.group(0), start_time, end_date.group(0), end_time))
-                else:
-                    print(f"Invalid date format in item: {item}")
-                    
-            return list_of_dates
-        except Exception as e:
-            print(f"Error extracting event dates: {e}")
+    def parse_event(self, page):
+        """Turn one page into an EventRecord, or None if it has no title or date."""
+        properties = page.get('properties', {})
+        title = properties.get('Action', {}).get('title') or []
+        date = properties.get('Date', {}).get('date')
+        if not title or not date:
             return None
-        
-    
-    def extract_description(self, page):
-        list_of_descriptions = []
-        for item in page:
-            content = item['properties']['Description']['rich_text']
-            if content == []:
-            
-                list_of_descriptions.append("No description available")
-                continue
-            else:
-                list_of_descriptions.append(content[0]['plain_text'])
-        return list_of_descriptions
-    
-            
-            
-    def creare_dict(self, event_name, event_date, description):
-        # Initialize the dictionary
-        event_dict = {}
-
-        # Use zip_longest to handle mismatched lengths
-        for name, date, desc in zip_longest(event_name, event_date, description, fillvalue="No information"):
-                
-            if not desc or len(desc) == 0:
-                desc = "No description available"
-            
-            # Create the dictionary entry
-            event_dict[name] = {
-                "date": date,
-                "description": desc
-            }
-
-        return event_dict
+
+        start_content = date.get('start') or ''
+        start_date = DATE_PATTERN.search(start_content)
+        if not start_date:
+            return None
+        start_time = TIME_PATTERN.search(start_content)
+        # Without an end the event ends on its start day
+        end_content = date.get('end') or start_date.group(0)
+        end_date = DATE_PATTERN.search(end_content)
+        end_time = TIME_PATTERN.search(end_content)
+
+        description = properties.get('Description', {}).get('rich_text') or []
+        return EventRecord(
+            page_id=page.get('id'),
+            name=title[0]['plain_text'],
+            start_date=start_date.group(0),
+            start_time=start_time.group(0) if start_time else "00:00",
+            end_date=end_date.group(0) if end_date else start_date.group(0),
+            end_time=end_time.group(0) if end_time else "23:59",
+            description=description[0]['plain_text'] if description else "No description available",
+        )
+
+    def iter_events(self, filter=None):
+        """Yield one EventRecord per page in a single pass over the paginated results."""
+        for page in self.iter_pages(filter):
+            event = self.parse_event(page)
+            if event is not None:
+                yield event
+
+    async def async_iter_events(self, filter=None, client=None):
+        async for page in self.async_iter_pages(filter, client):
+            event = self.parse_event(page)
+            if event is not None:
+                yield event
+
 
 if __name__ == '__main__':
     
     napi = ConnectNotionAPI()
-    pages = napi.get_pages()
-    content = napi.extract_event_name(pages)
-    date= napi.extract_event_date(pages)
-    description = napi.extract_description(pages)   
-    event_dict = napi.creare_dict(content, date, description)   
-    
-    
-    
-    
\ No newline at end of file
+    for event in napi.iter_events():
+        print(event)
@@ -1,57 +1,51 @@
 import os
-import sys
 import datetime
-import requests
+import dataclasses
 import logging
 from dotenv import load_dotenv
 from todoist_api_python.api import TodoistAPI
 
+from APIs.http_client import get_sync_client
+from APIs.WeatherAPI.hookup_api import WeatherAPI
 
-apis_dir = os.path.dirname(os.getcwd())
+logger = logging.getLogger(__name__)
 
-weather_api_dir = os.path.join(apis_dir, 'WeatherAPI')
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-print(current_dir)
-sys.path.insert(0, parent_dir)
 
-# Try to import WeatherAPI
+def task_to_dict(task) -> dict:
+    due = task.due
+    if due is not None and dataclasses.is_dataclass(due):
+        due = dataclasses.asdict(due)
+    return {
+        "id": task.id,
+        "content": task.content,
+        "due": due,
+        "priority": task.priority,
+        "project_id": task.project_id
+    }
 
-from WeatherAPI.hookup_api import WeatherAPI
 
-
-# Rest of your code remains the same
 class ConnectTodoistAPI:
     def __init__(self):
         self.api_key = os.getenv("td_api_key")
         if not self.api_key:
             raise ValueError("API Key not found. Please check your environment variables.")
-        self.api = TodoistAPI(self.api_key)
+        # Requests go through the shared client, and with it the upstream cache
+        self.api = TodoistAPI(self.api_key, client=get_sync_client())
 
     def get_projects(self):
         try:
             projects = self.api.get_projects()
             return projects
-        except Exception as e:
-            logging.error(f"Error getting projects: {e}")
+        except Exception:
+            logger.exception("Error getting projects")
             return []
 
     def assemble_tasks(self) -> list[dict]:
         try:
             tasks = self.api.get_tasks()
-            task_list = []
-            for task in tasks:
-                task_dict = {
-                    "id": task.id,
-                    "content": task.content,
-                    "due": task.due,
-                    "priority": task.priority,
-                    "project_id": task.project_id
-                }
-                task_list.append(task_dict)
-            return task_list
-        except Exception as e:
-            logging.error(f"Error assembling tasks: {e}")
+            return [task_to_dict(task) for task in tasks]
+        except Exception:
+            logger.exception("Error assembling tasks")
             return []
 
     def add_task(self, content="", due_date="", priority=1):
@@ -62,23 +56,23 @@ class ConnectTodoistAPI:
                 priority=priority
             )
             return task
-        except Exception as e:
-            logging.error(f"Error adding task: {e}")
+        except Exception:
+            logger.exception("Error adding task")
             return None
 
     def mark_task(self, task_id):
         try:
             is_success = self.api.close_task(task_id=task_id)
-            print(f"Task {task_id} marked as done: {is_success}")
-        except Exception as error:
-            print(f"Error marking task {task_id} as done: {error}")
+            logger.info(f"Task {task_id} marked as done: {is_success}")
+        except Exception:
+            logger.exception(f"Error marking task {task_id} as done")
 
     def update_task(self, task_id, **kwargs):
         try:
             updated_task = self.api.update_task(task_id=task_id, **kwargs)
             return updated_task
-        except Exception as e:
-            logging.error(f"Error updating task {task_id}: {e}")
+        except Exception:
+            logger.exception(f"Error updating task {task_id}")
             return None
 
     def put_sunscreens_reminder(self):
@@ -102,7 +96,7 @@ class ConnectTodoistAPI:
                 else:
                     return f"No reminder added. Temperature ({air_temperature}°C) is below threshold."
         except Exception as e:
-            logging.error(f"Error in put_sunscreens_reminder: {e}")
+            logger.exception("Error in put_sunscreens_reminder")
             return f"Error occurred: {str(e)}"
 
 if __name__ == '__main__':
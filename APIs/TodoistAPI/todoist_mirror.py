@@ -0,0 +1,210 @@
+import os
+import json
+import sqlite3
+import asyncio
+import threading
+import logging
+import uuid
+from datetime import datetime
+
+from APIs.http_client import get_client
+
+logger = logging.getLogger(__name__)
+
+SYNC_URL = os.getenv("TODOIST_SYNC_URL", "https://api.todoist.com/sync/v9/sync")
+MIRROR_PATH = os.getenv(
+    "TODOIST_MIRROR_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "todoist_mirror.db"),
+)
+RESOURCE_TYPES = ["items", "projects"]
+# The Sync API accepts at most this many commands per request
+MAX_COMMANDS_PER_REQUEST = 100
+
+
+class TodoistMirror:
+    """Local SQLite copy of Todoist tasks and projects.
+
+    ``sync`` sends the stored ``sync_token`` to the Sync API, so after the
+    first full sync every call only transfers what changed since the last
+    one. Requests go through the shared async HTTP client unless a
+    ``client`` is passed. ``sync_url`` can point at a local stub server
+    (bench.stubs.StubTodoist, as in tests/test_todoist_mirror.py).
+    ``on_sync`` is called with every applied payload.
+    """
+    def __init__(self, api_key=None, path=MIRROR_PATH, sync_url=SYNC_URL, on_sync=None):
+        self.api_key = api_key or os.getenv("td_api_key")
+        self.sync_url = sync_url
+        self.on_sync = on_sync
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.lock = threading.Lock()
+        # Serializes whole sync round trips so deltas are applied in order
+        self.sync_lock = asyncio.Lock()
+        self.last_sync = None
+        self.create_tables()
+
+    def create_tables(self):
+        with self.lock, self.conn:
+            self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS items (
+                id TEXT PRIMARY KEY,
+                content TEXT,
+                priority INTEGER,
+                project_id TEXT,
+                due TEXT,
+                child_order INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS projects (
+                id TEXT PRIMARY KEY,
+                name TEXT,
+                child_order INTEGER
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                sync_token TEXT
+            );
+            ''')
+
+    @property
+    def sync_token(self):
+        with self.lock:
+            row = self.conn.execute("SELECT sync_token FROM sync_state WHERE id = 1").fetchone()
+        return row[0] if row else "*"
+
+    @property
+    def is_synced(self):
+        """Whether a sync has ever completed, in this process or before a restart."""
+        return self.sync_token != "*"
+
+    async def sync(self, commands=None, client=None):
+        """Pull the changes since the last sync and apply them in one transaction.
+
+        ``commands`` are sent along in the same request; the response, which
+        includes their ``sync_status`` and ``temp_id_mapping``, is returned.
+        """
+        data = {"resource_types": json.dumps(RESOURCE_TYPES)}
+        if commands:
+            data["commands"] = json.dumps(commands)
+        async with self.sync_lock:
+            # SQLite runs in the threadpool, off the event loop
+            data["sync_token"] = await asyncio.to_thread(lambda: self.sync_token)
+            response = await (client or get_client()).post(
+                self.sync_url,
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                data=data,
+            )
+            response.raise_for_status()
+            payload = response.json()
+            await asyncio.to_thread(self.apply, payload)
+            self.last_sync = datetime.now()
+        if self.on_sync is not None:
+            self.on_sync(payload)
+        return payload
+
+    async def batch(self, operations, client=None):
+        """Run add/close/update operations as Sync API command batches.
+
+        Each operation is a dict with a ``type`` and the fields for it. An add
+        may carry a ``temp_id`` that later operations use as their ``task_id``,
+        also across the 100-command request boundary. Returns one status dict
+        per operation, in order.
+        """
+        commands = [self._command(operation) for operation in operations]
+        temp_id_mapping = {}
+        results = []
+        for start in range(0, len(commands), MAX_COMMANDS_PER_REQUEST):
+            chunk = commands[start:start + MAX_COMMANDS_PER_REQUEST]
+            for command in chunk:
+                task_id = command["args"].get("id")
+                if task_id in temp_id_mapping:
+                    command["args"]["id"] = str(temp_id_mapping[task_id])
+            try:
+                payload = await self.sync(commands=chunk, client=client)
+            except Exception as e:
+                logger.exception("Error running Todoist command batch")
+                results.extend({"status": "error", "task_id": command["args"].get("id"), "error": str(e)} for command in chunk)
+                continue
+            temp_id_mapping.update(payload.get("temp_id_mapping", {}))
+            for command in chunk:
+                status = payload.get("sync_status", {}).get(command["uuid"])
+                task_id = command.get("temp_id") or command["args"].get("id")
+                task_id = temp_id_mapping.get(task_id, task_id)
+                task_id = None if task_id is None else str(task_id)
+                if status == "ok":
+                    results.append({"status": "ok", "task_id": task_id, "error": None})
+                else:
+                    error = status.get("error") if isinstance(status, dict) else "No status returned"
+                    results.append({"status": "error", "task_id": task_id, "error": error})
+        return results
+
+    def _command(self, operation):
+        kind = operation["type"]
+        command = {"uuid": str(uuid.uuid4())}
+        if kind == "add":
+            args = {"content": operation.get("content") or ""}
+            if operation.get("priority"):
+                args["priority"] = operation["priority"]
+            if operation.get("due_string"):
+                args["due"] = {"string": operation["due_string"]}
+            command.update(type="item_add", temp_id=operation.get("temp_id") or str(uuid.uuid4()), args=args)
+        elif kind == "close":
+            command.update(type="item_close", args={"id": str(operation["task_id"])})
+        elif kind == "update":
+            args = {"id": str(operation["task_id"])}
+            for field in ("content", "priority"):
+                if operation.get(field) is not None:
+                    args[field] = operation[field]
+            if operation.get("due_string"):
+                args["due"] = {"string": operation["due_string"]}
+            command.update(type="item_update", args=args)
+        else:
+            raise ValueError(f"Unknown operation type: {kind}")
+        return command
+
+    def apply(self, payload):
+        with self.lock, self.conn:
+            if payload.get("full_sync"):
+                self.conn.execute("DELETE FROM items")
+                self.conn.execute("DELETE FROM projects")
+            for item in payload.get("items", []):
+                if item.get("is_deleted") or item.get("checked"):
+                    self.conn.execute("DELETE FROM items WHERE id = ?", (str(item["id"]),))
+                else:
+                    self._upsert_item(item)
+            for project in payload.get("projects", []):
+                if project.get("is_deleted") or project.get("is_archived"):
+                    self.conn.execute("DELETE FROM projects WHERE id = ?", (str(project["id"]),))
+                else:
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO projects (id, name, child_order) VALUES (?, ?, ?)",
+                        (str(project["id"]), project.get("name"), project.get("child_order", 0)),
+                    )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (id, sync_token) VALUES (1, ?)", (payload["sync_token"],)
+            )
+
+    def _upsert_item(self, item):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO items (id, content, priority, project_id, due, child_order) VALUES (?, ?, ?, ?, ?, ?)",
+            (str(item["id"]), item.get("content"), item.get("priority", 1), str(item.get("project_id")),
+             json.dumps(item.get("due")), item.get("child_order", 0)),
+        )
+
+    def get_tasks(self) -> list[dict]:
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT id, content, due, priority, project_id FROM items ORDER BY child_order, id"
+            ).fetchall()
+        return [{"id": row[0], "content": row[1], "due": json.loads(row[2]), "priority": row[3], "project_id": row[4]}
+                for row in rows]
+
+    def get_projects(self) -> list[dict]:
+        with self.lock:
+            rows = self.conn.execute("SELECT id, name FROM projects ORDER BY child_order, id").fetchall()
+        return [{"id": row[0], "name": row[1]} for row in rows]
+
+    async def sync_quietly(self, client=None):
+        """Scheduler job: sync, logging instead of raising on failure."""
+        try:
+            await self.sync(client=client)
+        except Exception:
+            logger.exception("Error syncing Todoist mirror")
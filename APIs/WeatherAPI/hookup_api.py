@@ -1,119 +1,552 @@
-import yr_weather as yw
 import os 
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
-import requests
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+import copy
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+import httpx
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+from APIs.http_client import get_client, get_sync_client
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+FORECAST_URL = "https://api.met.no/weatherapi/locationforecast/2.0/complete"
+# Used when yr does not send a usable Expires header
+DEFAULT_FORECAST_TTL = timedelta(minutes=30)
+# Refresh forecasts this long before yr says they expire
+REFRESH_MARGIN = timedelta(seconds=int(os.environ.get('WEATHER_REFRESH_MARGIN_SECONDS', 300)))
+# Upper bound on parallel upstream fetches
+MAX_CONCURRENT_FETCHES = int(os.environ.get('WEATHER_MAX_CONCURRENT_FETCHES', 8))
+# Locations whose snapshot is kept in memory; the least recently used one goes first
+MAX_CACHED_LOCATIONS = int(os.environ.get('WEATHER_MAX_CACHED_LOCATIONS', 256))
+
+
+# Lower bounds of the clothing tiers in °C, one more tier than bounds in CLOTHING_TIERS
+CLOTHING_THRESHOLDS = np.array([0, 5, 10, 15, 20, 25])
+CLOTHING_TIERS = np.array([
+    "Wear a heavy winter coat, thermal layers, gloves, scarf, hat, and warm boots.",
+    "Wear a thick jacket, scarf, gloves, and warm layers.",
+    "A jacket with a sweater or hoodie, and consider gloves.",
+    "Wear a light jacket or sweater, with long sleeves and pants.",
+    "A light sweater or jacket should be fine, maybe a T-shirt underneath.",
+    "Comfortable clothing like a T-shirt and jeans. A light sweater for evenings.",
+    "Light clothing like shorts and a T-shirt. Consider sunscreen if it's sunny.",
+])
+
+
+def _column(timeseries, block, name):
+    values = [time_step['data'].get(block, {}).get('details', {}).get(name) for time_step in timeseries]
+    return np.array([np.nan if value is None else value for value in values], dtype=float)
+
+
+@dataclass(frozen=True)
+class ForecastSnapshot:
+    """One locationforecast response for a location, valid until ``expires``.
+
+    All values the API hands out (temperature, precipitation, wind, UV and
+    tomorrow's time step) are derived from this object, so a request never
+    needs more than one upstream fetch. The timeseries is converted once into
+    NumPy columns indexed by epoch seconds; missing values are NaN.
+    """
+    latitude: float
+    longitude: float
+    timeseries: tuple
+    expires: datetime
+    last_modified: str = None
+    times: np.ndarray = field(init=False, repr=False)
+    temperature: np.ndarray = field(init=False, repr=False)
+    wind_speed_column: np.ndarray = field(init=False, repr=False)
+    precipitation_column: np.ndarray = field(init=False, repr=False)
+    hourly_precipitation_column: np.ndarray = field(init=False, repr=False)
+    uv_index_column: np.ndarray = field(init=False, repr=False)
+
+    def __post_init__(self):
+        times = np.array([time_step['time'].rstrip('Z') for time_step in self.timeseries], dtype='datetime64[s]')
+        object.__setattr__(self, 'times', times.astype(np.int64))
+        object.__setattr__(self, 'temperature', _column(self.timeseries, 'instant', 'air_temperature'))
+        object.__setattr__(self, 'wind_speed_column', _column(self.timeseries, 'instant', 'wind_speed'))
+        object.__setattr__(self, 'precipitation_column', _column(self.timeseries, 'next_6_hours', 'precipitation_amount'))
+        # yr only gives one-hour amounts for roughly the first 2.5 days; NaN after that
+        object.__setattr__(self, 'hourly_precipitation_column', _column(self.timeseries, 'next_1_hours', 'precipitation_amount'))
+        object.__setattr__(self, 'uv_index_column', _column(self.timeseries, 'instant', 'ultraviolet_index_clear_sky'))
+
+    def is_fresh(self):
+        return datetime.now(timezone.utc) < self.expires
+
+    def expires_within(self, margin):
+        return datetime.now(timezone.utc) + margin >= self.expires
+
+    def renewed(self, expires):
+        """The same forecast with a new expiry, for a 304 Not Modified answer."""
+        snapshot = copy.copy(self)
+        object.__setattr__(snapshot, 'expires', expires)
+        return snapshot
+
+    def index_at(self, when):
+        """Index of the time step nearest to ``when``, or None for an empty forecast."""
+        if not len(self.times):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        target = int(when.timestamp())
+        right = int(np.searchsorted(self.times, target))
+        if right == 0:
+            return 0
+        if right == len(self.times):
+            return right - 1
+        # Pick whichever neighbour is closer, preferring the later one on a tie
+        if target - self.times[right - 1] < self.times[right] - target:
+            return right - 1
+        return right
+
+    def at(self, when):
+        """Get the time step nearest to ``when`` (naive datetimes are UTC)."""
+        index = self.index_at(when)
+        return None if index is None else self.timeseries[index]
+
+    def now(self):
+        """Get the time step for the current hour, like ``yr_weather.Forecast.now``."""
+        return self.at(datetime.now(timezone.utc))
+
+    def tomorrow(self, days=1):
+        """Get the time step nearest to midday ``days`` days from now."""
+        tomorrow = datetime.now() + timedelta(days=days)
+        return self.at(tomorrow.replace(hour=12, minute=0, second=0, microsecond=0))
+
+    def _now_value(self, column):
+        index = self.index_at(datetime.now(timezone.utc))
+        if index is None or np.isnan(column[index]):
+            return None
+        return float(column[index])
+
+    @property
+    def air_temperature(self):
+        return self._now_value(self.temperature)
+
+    @property
+    def precipitation(self):
+        return self._now_value(self.precipitation_column)
+
+    @property
+    def wind_speed(self):
+        return self._now_value(self.wind_speed_column)
+
+    @property
+    def uv_index(self):
+        return self._now_value(self.uv_index_column)
+
+    def upcoming(self, hours=None):
+        """Slice of the columns from the current time step onwards.
+
+        ``hours`` limits the slice to steps starting less than that many hours
+        after the current one, so it holds at most ``hours`` hourly steps.
+        """
+        now = int(datetime.now(timezone.utc).timestamp())
+        start = max(int(np.searchsorted(self.times, now, side='right')) - 1, 0)
+        end = len(self.times)
+        if hours is not None and start < end:
+            end = int(np.searchsorted(self.times, self.times[start] + hours * 3600, side='left'))
+        return slice(start, end)
+
+
+# Snapshots shared by every WeatherAPI instance in this process, keyed on (lat, lon), least recently used first
+_snapshot_cache = OrderedDict()
+# One lock per location so concurrent requests for a location share a single fetch
+_snapshot_locks = {}
+# The same for the async path, which shares _snapshot_cache with the sync one
+_async_snapshot_locks = {}
+# Guards the three dicts above; clients choose the keys, so all of them are bounded
+_cache_lock = threading.Lock()
+# Called with every snapshot whose forecast changed, i.e. not for a mere 304 renewal
+forecast_listeners = []
+
+
+def normalize_coordinates(latitude, longitude):
+    """Round coordinates to the 4 decimals yr accepts, so equal locations share a cache entry."""
+    latitude, longitude = round(float(latitude), 4), round(float(longitude), 4)
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError(f"Coordinates out of range: {latitude}, {longitude}")
+    return latitude, longitude
+
+
+def _cached_snapshot(key):
+    with _cache_lock:
+        snapshot = _snapshot_cache.get(key)
+        if snapshot is not None:
+            _snapshot_cache.move_to_end(key)
+        return snapshot
+
+
+def _cache_snapshot(key, snapshot):
+    with _cache_lock:
+        _snapshot_cache[key] = snapshot
+        _snapshot_cache.move_to_end(key)
+        while len(_snapshot_cache) > MAX_CACHED_LOCATIONS:
+            evicted, _ = _snapshot_cache.popitem(last=False)
+            for locks in (_snapshot_locks, _async_snapshot_locks):
+                lock = locks.get(evicted)
+                if lock is not None and not lock.locked():
+                    del locks[evicted]
+
+
+def _location_lock(locks, key, factory):
+    """The lock for ``key`` in ``locks``, dropping idle locks of uncached locations (failed fetches) when full."""
+    with _cache_lock:
+        lock = locks.get(key)
+        if lock is None:
+            if len(locks) >= MAX_CACHED_LOCATIONS:
+                for stale in [k for k, l in locks.items() if k not in _snapshot_cache and not l.locked()]:
+                    del locks[stale]
+            lock = locks[key] = factory()
+        return lock
+
+
+def configured_locations():
+    """Locations to keep warm: LATITUDE/LONGITUDE plus WEATHER_LOCATIONS ("lat,lon;lat,lon")."""
+    locations = [(os.environ.get('LATITUDE', '52.5200'), os.environ.get('LONGITUDE', '13.4050'))]
+    for location in os.environ.get('WEATHER_LOCATIONS', '').split(';'):
+        if location.strip():
+            latitude, longitude = location.split(',')
+            locations.append((latitude, longitude))
+    return list(dict.fromkeys(normalize_coordinates(lat, lon) for lat, lon in locations))
+
+
+def refresh_forecasts(locations=None):
+    """Scheduler job: revalidate every configured forecast shortly before it expires."""
+    api = WeatherAPI()
+    for latitude, longitude in locations or configured_locations():
+        api.refresh_forecast(latitude, longitude)
+
+
+async def async_refresh_forecasts(locations=None, client=None):
+    """Async ``refresh_forecasts``, revalidating all locations concurrently."""
+    api = WeatherAPI()
+    await asyncio.gather(*(api.async_refresh_forecast(latitude, longitude, client=client)
+                           for latitude, longitude in locations or configured_locations()))
+
+
+def _parse_expires(headers):
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            return parsedate_to_datetime(expires)
+        except (TypeError, ValueError):
+            pass
+    return datetime.now(timezone.utc) + DEFAULT_FORECAST_TTL
+
+
 class WeatherAPI:
     def __init__(self):
-        try:
-            self.headers = {
-                "User-Agent": f"{os.environ.get('USER_AGENT')}",
-            }
-            self.my_client = yw.Locationforecast(headers=self.headers)
-        except Exception as e:
-            print(f"Error initializing WeatherAPI: {e}")
-        
+        # met.no requires an identifying User-Agent; responses are cached by APIs.upstream_cache
+        self.headers = {
+            "User-Agent": f"{os.environ.get('USER_AGENT')}",
+        }
+
+    def fetch_snapshot(self, latitude, longitude, previous=None):
+        """Fetch a fresh snapshot from yr, bypassing the in-process cache.
+
+        With a ``previous`` snapshot the request is conditional, so an
+        unchanged forecast costs a 304 and only extends the expiry. Without
+        one, a response still fresh in the upstream cache is reused, which
+        keeps restarts from refetching every location.
+        """
+        latitude, longitude = normalize_coordinates(latitude, longitude)
+        headers = dict(self.headers)
+        if previous is not None and previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+        response = get_sync_client().get(FORECAST_URL, params={"lat": latitude, "lon": longitude}, headers=headers)
+        return self._snapshot_from_response(latitude, longitude, response, previous)
+
+    async def async_fetch_snapshot(self, latitude, longitude, previous=None, client=None):
+        """Async ``fetch_snapshot`` over the shared HTTP client, or ``client`` if given."""
+        latitude, longitude = normalize_coordinates(latitude, longitude)
+        headers = dict(self.headers)
+        if previous is not None and previous.last_modified:
+            headers["If-Modified-Since"] = previous.last_modified
+        response = await (client or get_client()).get(
+            FORECAST_URL, params={"lat": latitude, "lon": longitude}, headers=headers
+        )
+        return self._snapshot_from_response(latitude, longitude, response, previous)
+
+    def _snapshot_from_response(self, latitude, longitude, response, previous):
+        if previous is not None and previous.last_modified:
+            unchanged = response.status_code == 304 or response.headers.get('Last-Modified') == previous.last_modified
+            if unchanged:
+                return previous.renewed(_parse_expires(response.headers))
+        response.raise_for_status()
+        return ForecastSnapshot(
+            latitude=latitude,
+            longitude=longitude,
+            timeseries=tuple(response.json()['properties']['timeseries']),
+            expires=_parse_expires(response.headers),
+            last_modified=response.headers.get('Last-Modified'),
+        )
+
     def get_forecast(self, latitude, longitude):
+        """Get the forecast snapshot for a location, fetching it only once it has expired.
+
+        If the fetch fails the expired snapshot is returned; ``is_fresh()``
+        tells callers it is stale.
+        """
+        key = normalize_coordinates(latitude, longitude)
+        snapshot = _cached_snapshot(key)
+        if snapshot is not None and snapshot.is_fresh():
+            return snapshot
         try:
-            forecast = self.my_client.get_forecast(latitude, longitude)
-            return forecast
-        except requests.exceptions.RequestException as e:
-            print(f"Network error while fetching forecast: {e}")
-        except Exception as e:
-            print(f"Error fetching forecast: {e}")
-    
+            return self._refresh(key, lambda snapshot: snapshot is None or not snapshot.is_fresh())
+        except httpx.HTTPError as e:
+            logger.warning("Network error while fetching forecast: %s", e)
+        except Exception:
+            logger.exception("Error fetching forecast")
+        # Last known good: an expired snapshot beats no forecast while api.met.no is down
+        return _cached_snapshot(key)
+
+    def refresh_forecast(self, latitude, longitude, margin=REFRESH_MARGIN):
+        """Revalidate a location's snapshot if it expires within ``margin``."""
+        key = normalize_coordinates(latitude, longitude)
+        try:
+            return self._refresh(key, lambda snapshot: snapshot is None or snapshot.expires_within(margin))
+        except httpx.HTTPError as e:
+            logger.warning("Network error while refreshing forecast: %s", e)
+        except Exception:
+            logger.exception("Error refreshing forecast")
+
+    def _refresh(self, key, is_due):
+        with _location_lock(_snapshot_locks, key, threading.Lock):
+            # Another thread may have refreshed it while we waited
+            snapshot = _cached_snapshot(key)
+            if is_due(snapshot):
+                snapshot = self._store(key, self.fetch_snapshot(*key, previous=snapshot), snapshot)
+            return snapshot
+
+    async def async_get_forecast(self, latitude, longitude, client=None):
+        """Async ``get_forecast``; a fresh cached snapshot is returned without awaiting anything."""
+        key = normalize_coordinates(latitude, longitude)
+        snapshot = _cached_snapshot(key)
+        if snapshot is not None and snapshot.is_fresh():
+            return snapshot
+        try:
+            return await self._async_refresh(key, lambda snapshot: snapshot is None or not snapshot.is_fresh(), client)
+        except httpx.HTTPError as e:
+            logger.warning("Network error while fetching forecast: %s", e)
+        except Exception:
+            logger.exception("Error fetching forecast")
+        return _cached_snapshot(key)
+
+    async def async_refresh_forecast(self, latitude, longitude, margin=REFRESH_MARGIN, client=None):
+        key = normalize_coordinates(latitude, longitude)
+        try:
+            return await self._async_refresh(key, lambda snapshot: snapshot is None or snapshot.expires_within(margin), client)
+        except httpx.HTTPError as e:
+            logger.warning("Network error while refreshing forecast: %s", e)
+        except Exception:
+            logger.exception("Error refreshing forecast")
+
+    async def _async_refresh(self, key, is_due, client=None):
+        async with _location_lock(_async_snapshot_locks, key, asyncio.Lock):
+            snapshot = _cached_snapshot(key)
+            if is_due(snapshot):
+                snapshot = self._store(key, await self.async_fetch_snapshot(*key, previous=snapshot, client=client), snapshot)
+            return snapshot
+
+    def _store(self, key, snapshot, previous):
+        _cache_snapshot(key, snapshot)
+        if previous is None or snapshot.last_modified != previous.last_modified:
+            for listener in forecast_listeners:
+                listener(snapshot)
+        return snapshot
+
     def get_air_temperature(self, latitude, longitude):
         try:
-            air_temperature = self.my_client.get_air_temperature(latitude, longitude)
-            return air_temperature
-        except Exception as e:
-            print(f"Error fetching air temperature: {e}")
+            forecast = self.get_forecast(latitude, longitude)
+            if forecast:
+                return forecast.air_temperature
+            return None
+        except Exception:
+            logger.exception("Error fetching air temperature")
             return None
     
     def get_tomorrow_forecast(self, latitude, longitude, days = 1):
-        """Get the weather forecast for the same time tomorrow."""
+        """Get the weather forecast for midday tomorrow."""
         try:
             forecast = self.get_forecast(latitude, longitude)
             if forecast:
-                # Accessing the private _timeseries attribute
-                timeseries = forecast._timeseries
-
-                # Get the current time and add 24 hours to get tomorrow's time
-                now = datetime.now()
-                tomorrow = now + timedelta(days=days)
-                midday_tomorrow = tomorrow.replace(hour=12, minute=0, second=0, microsecond=0)  
-
-                for time_step in timeseries:
-                    forecast_time = datetime.strptime(time_step['time'], "%Y-%m-%dT%H:%M:%SZ")
-
-                    
-                    # Compare both the date and time to match exactly midday tomorrow
-                    if forecast_time == midday_tomorrow:
-                        return time_step
-
-
-                print("Could not find a forecast for tomorrow.")
+                time_step = forecast.tomorrow(days=days)
+                if time_step:
+                    return time_step
+                logger.info("Could not find a forecast for tomorrow.")
             return None
-        except Exception as e:
-            print(f"Error fetching tomorrow's forecast: {e}")
+        except Exception:
+            logger.exception("Error fetching tomorrow's forecast")
             return None
     
     def get_precipitation(self, latitude, longitude):
         try:
             forecast = self.get_forecast(latitude, longitude)
             if forecast:
-                forecast_now = forecast.now()
-                next_6_hrs = forecast_now.next_6_hours
-                precipitation = next_6_hrs.details.precipitation_amount
-                return precipitation
+                return forecast.precipitation
             else:
                 return None
-        except Exception as e:
-            print(f"Error fetching precipitation data: {e}")
+        except Exception:
+            logger.exception("Error fetching precipitation data")
             return None
 
     def get_wind_data(self, latitude, longitude):
         try:
             forecast = self.get_forecast(latitude, longitude)
             if forecast:
-                forecast_now = forecast.now()
-                wind_speed = forecast_now.details.wind_speed
-                return wind_speed
+                return forecast.wind_speed
             else:
                 return None
-        except Exception as e:
-            print(f"Error fetching wind data: {e}")
+        except Exception:
+            logger.exception("Error fetching wind data")
             return None
 
     def get_uv_index(self, latitude, longitude):
         try:
             forecast = self.get_forecast(latitude, longitude)
             if forecast:
-                forecast_now = forecast.now()
-                uv_index = forecast_now.details.ultraviolet_index_clear_sky
-                return uv_index
+                return forecast.uv_index
             else:
                 return None
-        except Exception as e:
-            print(f"Error fetching UV index: {e}")
+        except Exception:
+            logger.exception("Error fetching UV index")
             return None
 
     def calculate_wind_chill(self, temperature, wind_speed):
-        """Calculate wind chill temperature if the temperature is below 10°C."""
-        if temperature < 10 and wind_speed > 0:
-            wind_chill = 13.12 + 0.6215 * temperature - 11.37 * (wind_speed**0.16) + 0.3965 * temperature * (wind_speed**0.16)
-            return round(wind_chill, 2)
-        return temperature
+        """Calculate wind chill temperature if the temperature is below 10°C.
+
+        Works on scalars as well as on whole NumPy columns.
+        """
+        temperature = np.asarray(temperature, dtype=float)
+        wind_speed = np.asarray(wind_speed, dtype=float)
+        with np.errstate(invalid='ignore'):
+            wind_factor = wind_speed**0.16
+            wind_chill = 13.12 + 0.6215 * temperature - 11.37 * wind_factor + 0.3965 * temperature * wind_factor
+            adjusted = np.where((temperature < 10) & (wind_speed > 0), np.round(wind_chill, 2), temperature)
+        return adjusted.item() if adjusted.ndim == 0 else adjusted
+
+    def clothing_for_temperature(self, temperature):
+        """Clothing tier text for a temperature, or an array of them for a column."""
+        tiers = CLOTHING_TIERS[np.digitize(temperature, CLOTHING_THRESHOLDS)]
+        return tiers.item() if np.ndim(tiers) == 0 else tiers
+
+    def get_hourly_forecast(self, latitude, longitude, hours=None):
+        """Feels-like temperatures and clothing suggestions for every upcoming time step.
+
+        Everything is computed column-wise over the snapshot, so the full
+        9-day horizon costs the same handful of NumPy operations as a single hour.
+        """
+        forecast = self.get_forecast(latitude, longitude)
+        return self.hourly_columns(forecast, hours) if forecast else None
+
+    async def async_get_hourly_forecast(self, latitude, longitude, hours=None, client=None):
+        forecast = await self.async_get_forecast(latitude, longitude, client=client)
+        return self.hourly_columns(forecast, hours) if forecast else None
+
+    def hourly_columns(self, forecast, hours=None):
+        """The columns of ``get_hourly_forecast`` for an already fetched snapshot."""
+        try:
+            window = forecast.upcoming(hours)
+            temperature = forecast.temperature[window]
+            wind_speed = forecast.wind_speed_column[window]
+            precipitation = forecast.precipitation_column[window]
+            hourly_precipitation = forecast.hourly_precipitation_column[window]
+            uv_index = forecast.uv_index_column[window]
+
+            feels_like = self.calculate_wind_chill(temperature, wind_speed)
+            with np.errstate(invalid='ignore'):
+                suggestion = self.clothing_for_temperature(feels_like)
+                extras = (
+                    (precipitation > 0, " Bring an umbrella or wear a waterproof jacket."),
+                    (precipitation > 5, " Wear waterproof shoes or boots."),
+                    (wind_speed > 5, " Wear a windproof jacket."),
+                    (uv_index > 3, " Wear sunglasses and apply sunscreen."),
+                )
+            for mask, text in extras:
+                suggestion = np.char.add(suggestion, np.where(mask, text, ""))
+            suggestion = np.where(np.isnan(feels_like), "No suggestion available", suggestion)
+
+            return {
+                "time": np.char.add(forecast.times[window].astype('datetime64[s]').astype(str), "Z"),
+                "temperature": temperature,
+                "feels_like": feels_like,
+                "wind_speed": wind_speed,
+                # The amount within the hour; the suggestions look at the next six hours
+                "precipitation": hourly_precipitation,
+                "precipitation_next_6h": precipitation,
+                "uv_index": uv_index,
+                "suggestion": suggestion,
+            }
+        except Exception:
+            logger.exception("Error building hourly forecast")
+            return None
+
+    def get_weather_summary(self, latitude, longitude):
+        """Temperature plus today's and tomorrow's suggestions, the payload of /api/weather."""
+        forecast = self.get_forecast(latitude, longitude)
+        return self.forecast_summary(forecast) if forecast else None
+
+    async def async_get_weather_summary(self, latitude, longitude, client=None):
+        forecast = await self.async_get_forecast(latitude, longitude, client=client)
+        return self.forecast_summary(forecast) if forecast else None
+
+    def forecast_summary(self, forecast):
+        temperature = forecast.air_temperature
+        if temperature is None:
+            return None
+        return {
+            "temperature": temperature,
+            "todays_suggestion": self.clothing_suggestion(forecast),
+            "tomorrows_suggestion": self.clothing_suggestion_for_tomorrow(forecast.tomorrow()),
+            "stale": not forecast.is_fresh(),
+        }
+
+    def get_weather_batch(self, coordinates, max_workers=MAX_CONCURRENT_FETCHES):
+        """Weather summaries for many locations, keyed on their normalized coordinates.
+
+        Duplicate locations are fetched once and distinct ones concurrently,
+        at most ``max_workers`` at a time.
+        """
+        locations = list(dict.fromkeys(normalize_coordinates(lat, lon) for lat, lon in coordinates))
+        if not locations:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(locations))) as executor:
+            summaries = executor.map(lambda location: self.get_weather_summary(*location), locations)
+            return dict(zip(locations, summaries))
+
+    async def async_get_weather_batch(self, coordinates, max_concurrency=MAX_CONCURRENT_FETCHES, client=None):
+        """Async ``get_weather_batch``, at most ``max_concurrency`` fetches in flight."""
+        locations = list(dict.fromkeys(normalize_coordinates(lat, lon) for lat, lon in coordinates))
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def summary(location):
+            async with semaphore:
+                return await self.async_get_weather_summary(*location, client=client)
+
+        summaries = await asyncio.gather(*(summary(location) for location in locations))
+        return dict(zip(locations, summaries))
 
     def suggest_clothing(self, latitude, longitude, activity="general", time_of_day="day"):
+        forecast = self.get_forecast(latitude, longitude)
+        if not forecast:
+            return "Unable to provide clothing suggestions at the moment."
+        return self.clothing_suggestion(forecast, activity=activity, time_of_day=time_of_day)
+
+    def clothing_suggestion(self, forecast, activity="general", time_of_day="day"):
         try:
-            temperature = self.get_air_temperature(latitude, longitude)
-            precipitation = self.get_precipitation(latitude, longitude)
-            wind_speed = self.get_wind_data(latitude, longitude)
-            uv_index = self.get_uv_index(latitude, longitude)
+            temperature = forecast.air_temperature
+            precipitation = forecast.precipitation
+            wind_speed = forecast.wind_speed
+            uv_index = forecast.uv_index
 
             suggestions = []
 
@@ -127,20 +560,7 @@ class WeatherAPI:
                     suggestions.append(f"Due to wind, it feels like {adjusted_temp}°C.")
 
                 # More nuanced temperature-based clothing suggestions
-                if adjusted_temp < 0:
-                    suggestions.append("Wear a heavy winter coat, thermal layers, gloves, scarf, hat, and warm boots.")
-                elif 0 <= adjusted_temp < 5:
-                    suggestions.append("Wear a thick jacket, scarf, gloves, and warm layers.")
-                elif 5 <= adjusted_temp < 10:
-                    suggestions.append("A jacket with a sweater or hoodie, and consider gloves.")
-                elif 10 <= adjusted_temp < 15:
-                    suggestions.append("Wear a light jacket or sweater, with long sleeves and pants.")
-                elif 15 <= adjusted_temp < 20:
-                    suggestions.append("A light sweater or jacket should be fine, maybe a T-shirt underneath.")
-                elif 20 <= adjusted_temp < 25:
-                    suggestions.append("Comfortable clothing like a T-shirt and jeans. A light sweater for evenings.")
-                else:
-                    suggestions.append("Light clothing like shorts and a T-shirt. Consider sunscreen if it's sunny.")
+                suggestions.append(self.clothing_for_temperature(adjusted_temp))
 
             # Add precipitation-based suggestions
             if precipitation and precipitation > 0:
@@ -168,13 +588,17 @@ class WeatherAPI:
             else:
                 return "No significant weather changes. Dress comfortably."
 
-        except Exception as e:
-            print(f"Error providing clothing suggestions: {e}")
+        except Exception:
+            logger.exception("Error providing clothing suggestions")
             return "Unable to provide clothing suggestions at the moment."
     
     def suggest_clothing_for_tomorrow(self, latitude, longitude, activity="general", time_of_day="day"):
+        forecast = self.get_tomorrow_forecast(latitude, longitude)
+        return self.clothing_suggestion_for_tomorrow(forecast, activity=activity, time_of_day=time_of_day)
+
+    def clothing_suggestion_for_tomorrow(self, forecast, activity="general", time_of_day="day"):
+        """Suggestion for tomorrow's time step of a snapshot (see ``ForecastSnapshot.tomorrow``)."""
         try:
-            forecast = self.get_tomorrow_forecast(latitude, longitude)
             if forecast:
                 # Extract necessary data from the forecast
                 air_temperature = forecast['data']['instant']['details']['air_temperature']
@@ -187,20 +611,7 @@ class WeatherAPI:
                 suggestions.append(f"Tomorrow's temperature will be {air_temperature}°C.")
 
                 # More nuanced temperature-based clothing suggestions
-                if air_temperature < 0:
-                    suggestions.append("Wear a heavy winter coat, thermal layers, gloves, scarf, hat, and warm boots.")
-                elif 0 <= air_temperature < 5:
-                    suggestions.append("Wear a thick jacket, scarf, gloves, and warm layers.")
-                elif 5 <= air_temperature < 10:
-                    suggestions.append("A jacket with a sweater or hoodie, and consider gloves.")
-                elif 10 <= air_temperature < 15:
-                    suggestions.append("Wear a light jacket or sweater, with long sleeves and pants.")
-                elif 15 <= air_temperature < 20:
-                    suggestions.append("A light sweater or jacket should be fine, maybe a T-shirt underneath.")
-                elif 20 <= air_temperature < 25:
-                    suggestions.append("Comfortable clothing like a T-shirt and jeans. A light sweater for evenings.")
-                else:
-                    suggestions.append("Light clothing like shorts and a T-shirt. Consider sunscreen if it's sunny.")
+                suggestions.append(self.clothing_for_temperature(air_temperature))
 
                 # Add precipitation-based suggestions
                 if precipitation and precipitation > 0:
@@ -225,8 +636,8 @@ class WeatherAPI:
                     return "No significant weather changes for tomorrow. Dress comfortably."
 
             return "Unable to retrieve tomorrow's forecast."
-        except Exception as e:
-            print(f"Error providing clothing suggestions for tomorrow: {e}")
+        except Exception:
+            logger.exception("Error providing clothing suggestions for tomorrow")
             return "Unable to provide clothing suggestions for tomorrow at the moment."
 
 
@@ -249,5 +660,5 @@ if __name__ == "__main__":
 
         else:
             print("Latitude and longitude are not set in the environment variables.")
-    except Exception as e:
-        print(f"Error during execution: {e}")
+    except Exception:
+        logger.exception("Error during execution")
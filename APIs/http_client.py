@@ -0,0 +1,128 @@
+import os
+import threading
+import httpx
+
+from APIs.upstream_cache import AsyncCachingTransport, CachingTransport, get_cache
+from APIs.resilience import AsyncProviderTransport, ProviderTransport
+
+# Requests pass the upstream cache first, so fresh entries are served even
+# while a provider's circuit breaker is open; misses then pass the breaker
+# and get the provider's timeout (APIs/resilience.py)
+
+# Upper bound on concurrent upstream connections across all connectors
+MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", 100))
+# Idle connections kept open for reuse, so repeat calls skip the TLS handshake
+MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT_SECONDS", 30))
+
+LIMITS = httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_KEEPALIVE_CONNECTIONS)
+# Upstream hosts to send elsewhere, "host=http://127.0.0.1:9101;host=..." (e.g. the
+# benchmark's stub servers); breakers and cache keys still see the original host
+UPSTREAM_OVERRIDES = os.getenv("UPSTREAM_OVERRIDES", "")
+
+
+def parse_overrides(value):
+    overrides = {}
+    for entry in value.split(";"):
+        if entry.strip():
+            host, target = entry.split("=", 1)
+            overrides[host.strip()] = httpx.URL(target.strip())
+    return overrides
+
+
+def _redirect(request, overrides):
+    target = overrides.get(request.url.host)
+    if target is not None:
+        # The Host header keeps the original name, so a stub can tell providers apart
+        request.url = request.url.copy_with(scheme=target.scheme, host=target.host, port=target.port)
+
+
+class OverrideTransport(httpx.BaseTransport):
+    """Sends requests for the hosts in ``overrides`` to another origin."""
+    def __init__(self, overrides, transport=None):
+        self.overrides = overrides
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        _redirect(request, self.overrides)
+        return self.transport.handle_request(request)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncOverrideTransport(httpx.AsyncBaseTransport):
+    """Async ``OverrideTransport``."""
+    def __init__(self, overrides, transport=None):
+        self.overrides = overrides
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        _redirect(request, self.overrides)
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+# The one async client of the process, opened and closed with the app's lifespan
+_client = None
+# Its blocking counterpart for scripts and libraries without async support
+_sync_client = None
+_sync_client_lock = threading.Lock()
+
+
+def create_client(transport=None, **kwargs):
+    """An async client whose requests all go through the upstream cache and the provider breakers."""
+    transport = transport or httpx.AsyncHTTPTransport(limits=LIMITS)
+    if UPSTREAM_OVERRIDES:
+        transport = AsyncOverrideTransport(parse_overrides(UPSTREAM_OVERRIDES), transport)
+    upstream = AsyncProviderTransport(transport)
+    return httpx.AsyncClient(
+        transport=AsyncCachingTransport(get_cache(), upstream),
+        timeout=HTTP_TIMEOUT,
+        follow_redirects=True,
+        **kwargs,
+    )
+
+
+async def start_client(**kwargs):
+    """Open the shared client; ``kwargs`` go to httpx.AsyncClient (e.g. a mock transport)."""
+    global _client
+    if _client is None:
+        _client = create_client(**kwargs)
+    return _client
+
+
+async def close_client():
+    global _client, _sync_client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+    with _sync_client_lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+def get_client():
+    """The shared client; connectors use it unless they are handed another one."""
+    if _client is None:
+        raise RuntimeError("The shared HTTP client is not running; call start_client() first")
+    return _client
+
+
+def get_sync_client(transport=None):
+    """The shared blocking client, created on first use, cached like the async one."""
+    global _sync_client
+    with _sync_client_lock:
+        if _sync_client is None:
+            transport = transport or httpx.HTTPTransport(limits=LIMITS)
+            if UPSTREAM_OVERRIDES:
+                transport = OverrideTransport(parse_overrides(UPSTREAM_OVERRIDES), transport)
+            upstream = ProviderTransport(transport)
+            _sync_client = httpx.Client(
+                transport=CachingTransport(get_cache(), upstream),
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+            )
+        return _sync_client
@@ -0,0 +1,228 @@
+import os
+import time
+import threading
+import httpx
+
+from APIs.metrics import Counter, Histogram, record_phase
+
+# Upstream hosts and the provider each belongs to
+PROVIDER_HOSTS = {
+    "api.todoist.com": "todoist",
+    "api.notion.com": "notion",
+    "api.met.no": "weather",
+    "tagesschau.de": "tagesschau",
+    "www.tagesschau.de": "tagesschau",
+    "newsapi.org": "newsapi",
+    "medium.com": "medium",
+}
+# Seconds a single upstream call may take, overridable with <PROVIDER>_TIMEOUT_SECONDS
+DEFAULT_TIMEOUTS = {
+    "todoist": 10,
+    "notion": 10,
+    "weather": 5,
+    "tagesschau": 10,
+    "newsapi": 10,
+    "medium": 10,
+}
+# Consecutive failures that open a breaker, and how long it stays open before a trial call
+FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5))
+RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_SECONDS", 30))
+
+
+def provider_for(host):
+    return PROVIDER_HOSTS.get(host)
+
+
+def provider_timeout(provider):
+    return float(os.getenv(f"{provider.upper()}_TIMEOUT_SECONDS", DEFAULT_TIMEOUTS.get(provider, 30)))
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised instead of calling an upstream whose breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed, open or half-open state of one upstream provider.
+
+    After ``failure_threshold`` consecutive failures the breaker opens and
+    calls fail fast. Once ``reset_timeout`` has passed it lets a single trial
+    call through (half-open): success closes it again, failure reopens it.
+    """
+    def __init__(self, name, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self.trial_running = False
+        self.last_failure = None
+        self.last_success = None
+
+    def allow(self):
+        """Whether a call may go upstream now; claims the trial call when half-open."""
+        with self.lock:
+            if self.state == "open" and time.time() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and not self.trial_running:
+                self.trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self.lock:
+            self.state = "closed"
+            self.failures = 0
+            self.trial_running = False
+            self.last_success = time.time()
+
+    def abandon(self):
+        """Release the trial call of a request that ended without an answer (e.g. cancelled)."""
+        with self.lock:
+            self.trial_running = False
+
+    def record_failure(self, error):
+        with self.lock:
+            self.failures += 1
+            self.trial_running = False
+            self.last_failure = str(error)
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.time()
+
+    @property
+    def is_degraded(self):
+        return self.state != "closed"
+
+    def snapshot(self):
+        with self.lock:
+            retry_in = None
+            if self.state == "open":
+                retry_in = max(self.reset_timeout - (time.time() - self.opened_at), 0)
+            return {
+                "provider": self.name,
+                "state": self.state,
+                "failures": self.failures,
+                "timeout_seconds": provider_timeout(self.name),
+                "retry_in_seconds": retry_in,
+                "last_failure": self.last_failure,
+                "last_success": self.last_success,
+            }
+
+
+_breakers = {name: CircuitBreaker(name) for name in DEFAULT_TIMEOUTS}
+
+
+def get_breaker(provider):
+    return _breakers[provider]
+
+
+def is_degraded(provider):
+    """Whether data from ``provider`` is currently only the last known good state."""
+    return _breakers[provider].is_degraded
+
+
+def breaker_states():
+    return [breaker.snapshot() for breaker in _breakers.values()]
+
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Time until an upstream provider answered a request the cache could not serve",
+    ("provider", "outcome"),
+)
+CIRCUIT_REJECTIONS = Counter(
+    "upstream_circuit_open_total", "Requests failed fast because the provider's breaker was open", ("provider",)
+)
+
+
+def _observe(provider, started, outcome):
+    elapsed = time.perf_counter() - started
+    UPSTREAM_LATENCY.observe(elapsed, provider=provider, outcome=outcome)
+    record_phase(f"upstream.{provider}", elapsed)
+
+
+def _outcome(response):
+    return f"{response.status_code // 100}xx"
+
+
+def _failed(response):
+    # 429 and 5xx mean the upstream is overloaded or down; other statuses are answers
+    return response.status_code == 429 or response.status_code >= 500
+
+
+class ProviderTransport(httpx.BaseTransport):
+    """Applies the provider's timeout and circuit breaker to every request, and times it."""
+    def __init__(self, transport=None):
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        provider = provider_for(request.url.host)
+        started = time.perf_counter()
+        if provider is None:
+            response = self.transport.handle_request(request)
+            _observe("other", started, _outcome(response))
+            return response
+        breaker = get_breaker(provider)
+        if not breaker.allow():
+            CIRCUIT_REJECTIONS.inc(provider=provider)
+            raise CircuitOpenError(f"{provider} circuit is open", request=request)
+        request.extensions["timeout"] = httpx.Timeout(provider_timeout(provider)).as_dict()
+        try:
+            response = self.transport.handle_request(request)
+        except httpx.TransportError as e:
+            breaker.record_failure(e)
+            _observe(provider, started, "error")
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        _observe(provider, started, _outcome(response))
+        if _failed(response):
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncProviderTransport(httpx.AsyncBaseTransport):
+    """Async ``ProviderTransport``."""
+    def __init__(self, transport=None):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        provider = provider_for(request.url.host)
+        started = time.perf_counter()
+        if provider is None:
+            response = await self.transport.handle_async_request(request)
+            _observe("other", started, _outcome(response))
+            return response
+        breaker = get_breaker(provider)
+        if not breaker.allow():
+            CIRCUIT_REJECTIONS.inc(provider=provider)
+            raise CircuitOpenError(f"{provider} circuit is open", request=request)
+        request.extensions["timeout"] = httpx.Timeout(provider_timeout(provider)).as_dict()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except httpx.TransportError as e:
+            breaker.record_failure(e)
+            _observe(provider, started, "error")
+            raise
+        except BaseException:
+            breaker.abandon()
+            raise
+        _observe(provider, started, _outcome(response))
+        if _failed(response):
+            breaker.record_failure(f"HTTP {response.status_code}")
+        else:
+            breaker.record_success()
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
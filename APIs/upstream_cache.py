@@ -0,0 +1,351 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+import httpx
+
+CACHE_PATH = os.getenv(
+    "UPSTREAM_CACHE_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "upstream_cache.db"),
+)
+# Entries kept in memory in front of SQLite
+MEMORY_ENTRIES = int(os.getenv("UPSTREAM_CACHE_MEMORY_ENTRIES", 128))
+# Bounds of the SQLite tier: total body size, and how long any entry may be kept
+MAX_BYTES = int(os.getenv("UPSTREAM_CACHE_MAX_MB", 64)) * 1024 * 1024
+MAX_AGE_SECONDS = int(os.getenv("UPSTREAM_CACHE_MAX_AGE_HOURS", 24 * 7)) * 3600
+CACHEABLE_METHODS = {"GET", "HEAD"}
+# Statuses that may be stored (RFC 9111, 4.2.2)
+CACHEABLE_STATUSES = {200, 203, 204, 300, 301, 308, 404, 405, 410, 414, 501}
+# Upper bound for the Last-Modified heuristic when a response has no explicit freshness
+MAX_HEURISTIC_LIFETIME = 24 * 3600
+# Headers of a 304 that must not replace the stored ones
+BODY_HEADERS = {"content-length", "content-encoding", "transfer-encoding"}
+
+
+def parse_cache_control(value):
+    directives = {}
+    for part in (value or "").split(","):
+        name, _, argument = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = argument.strip('"') or None
+    return directives
+
+
+def _http_date(value):
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def freshness_lifetime(headers, now):
+    """Seconds a response stays fresh after it was received, from its headers."""
+    directives = parse_cache_control(headers.get("cache-control"))
+    if "no-cache" in directives:
+        return 0
+    if (directives.get("max-age") or "").isdigit():
+        lifetime = int(directives["max-age"])
+    else:
+        date = _http_date(headers.get("date")) or now
+        if headers.get("expires") is not None:
+            # An unparsable Expires means already expired
+            expires = _http_date(headers.get("expires"))
+            lifetime = max(expires - date, 0) if expires else 0
+        elif _http_date(headers.get("last-modified")):
+            lifetime = min(max(date - _http_date(headers.get("last-modified")), 0) * 0.1, MAX_HEURISTIC_LIFETIME)
+        else:
+            lifetime = 0
+    age = headers.get("age", "")
+    return max(lifetime - (int(age) if age.isdigit() else 0), 0)
+
+
+@dataclass
+class CachedResponse:
+    status: int
+    headers: list
+    body: bytes
+    stored_at: float
+    fresh_until: float
+    # Request header values the response varies on, see ``Vary``
+    vary: dict = field(default_factory=dict)
+
+    @property
+    def etag(self):
+        return httpx.Headers(self.headers).get("etag")
+
+    @property
+    def last_modified(self):
+        return httpx.Headers(self.headers).get("last-modified")
+
+    def is_fresh(self, now):
+        return now < self.fresh_until
+
+    def matches(self, request_headers):
+        return all(request_headers.get(name) == value for name, value in self.vary.items())
+
+
+@dataclass
+class CachePlan:
+    """How one request is served: ``fresh`` from the cache, ``revalidate``
+    the stored entry, ``fetch`` and store, or ``bypass`` the cache."""
+    action: str
+    key: str = None
+    entry: CachedResponse = None
+    request_headers: dict = None
+
+    def conditional_headers(self):
+        headers = {}
+        if self.entry.etag:
+            headers["If-None-Match"] = self.entry.etag
+        if self.entry.last_modified:
+            headers["If-Modified-Since"] = self.entry.last_modified
+        return headers
+
+
+class UpstreamCache:
+    """HTTP cache shared by every upstream connector.
+
+    A small LRU in memory sits in front of a SQLite table that survives
+    restarts. Freshness follows the upstream's Cache-Control, Expires and
+    Age headers, with the usual Last-Modified heuristic as fallback. Stale
+    entries that carry an ETag or Last-Modified are revalidated with a
+    conditional request, so an unchanged resource costs a 304. The SQLite
+    tier is bounded to ``max_bytes``, dropping the least recently read
+    entries first, and nothing is kept longer than ``max_age`` seconds.
+    """
+    def __init__(self, path=CACHE_PATH, memory_entries=MEMORY_ENTRIES, max_bytes=MAX_BYTES, max_age=MAX_AGE_SECONDS):
+        self.memory_entries = memory_entries
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.memory = OrderedDict()
+        # key -> time of the last read served from memory, written to last_used before evicting
+        self.touched = {}
+        self.lock = threading.Lock()
+        self.counters = dict.fromkeys(
+            ("hits", "misses", "revalidations", "not_modified", "stores", "evictions", "bypassed"), 0
+        )
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.conn:
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                status INTEGER,
+                headers TEXT,
+                body BLOB,
+                vary TEXT,
+                stored_at REAL,
+                fresh_until REAL,
+                last_used REAL
+            )
+            ''')
+            self.conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+
+    @staticmethod
+    def key(method, url, headers):
+        # Credentials are part of the key, so two accounts never share an entry
+        credentials = "\x1f".join(headers.get(name) or "" for name in ("authorization", "cookie"))
+        return hashlib.sha256("\x1f".join((method, url, credentials)).encode()).hexdigest()
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def get(self, key, now=None):
+        now = now or time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                if now - entry.stored_at <= self.max_age:
+                    self.memory.move_to_end(key)
+                    self.touched[key] = now
+                    return entry
+                del self.memory[key]
+            row = self.conn.execute(
+                "SELECT status, headers, body, vary, stored_at, fresh_until FROM responses WHERE key = ? AND stored_at >= ?",
+                (key, now - self.max_age),
+            ).fetchone()
+            if row is None:
+                return None
+            with self.conn:
+                self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            entry = CachedResponse(row[0], json.loads(row[1]), row[2], row[4], row[5], json.loads(row[3]))
+            self._remember(key, entry)
+            return entry
+
+    def put(self, key, entry):
+        with self.lock:
+            self._remember(key, entry)
+            self.touched.pop(key, None)
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (key, entry.status, json.dumps(entry.headers), entry.body, json.dumps(entry.vary),
+                     entry.stored_at, entry.fresh_until, entry.stored_at),
+                )
+                self._evict(entry.stored_at)
+
+    def _remember(self, key, entry):
+        self.memory[key] = entry
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            self.memory.popitem(last=False)
+
+    def _evict(self, now):
+        evicted = self.conn.execute("DELETE FROM responses WHERE stored_at < ?", (now - self.max_age,)).rowcount
+        total = self.conn.execute("SELECT COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()[0]
+        if total > self.max_bytes:
+            # Memory hits skip SQLite, so their reads only count from here on
+            self.conn.executemany("UPDATE responses SET last_used = ? WHERE key = ?",
+                                  [(used, key) for key, used in self.touched.items()])
+            self.touched.clear()
+            for key, size in self.conn.execute("SELECT key, LENGTH(body) FROM responses ORDER BY last_used").fetchall():
+                if total <= self.max_bytes:
+                    break
+                self.conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.memory.pop(key, None)
+                self.touched.pop(key, None)
+                total -= size or 0
+                evicted += 1
+        self.counters["evictions"] += evicted
+
+    def plan(self, method, url, headers):
+        """Decide how a request is served, counting the outcome."""
+        directives = parse_cache_control(headers.get("cache-control"))
+        if method not in CACHEABLE_METHODS or "no-store" in directives:
+            self.count("bypassed")
+            return CachePlan("bypass")
+        key = self.key(method, url, headers)
+        request_headers = dict(headers)
+        if headers.get("if-none-match") or headers.get("if-modified-since"):
+            # The caller validates against its own copy; just pass the answer through
+            self.count("misses")
+            return CachePlan("fetch", key, request_headers=request_headers)
+        now = time.time()
+        entry = self.get(key, now)
+        if entry is not None and not entry.matches(headers):
+            entry = None
+        if entry is None:
+            self.count("misses")
+            return CachePlan("fetch", key, request_headers=request_headers)
+        if entry.is_fresh(now) and "no-cache" not in directives and directives.get("max-age") != "0":
+            self.count("hits")
+            return CachePlan("fresh", key, entry)
+        if entry.etag or entry.last_modified:
+            self.count("revalidations")
+            return CachePlan("revalidate", key, entry, request_headers)
+        self.count("misses")
+        return CachePlan("fetch", key, request_headers=request_headers)
+
+    def wants(self, plan, status, headers):
+        """Whether the upstream response has to go through ``complete``."""
+        if plan.action == "revalidate" and status == 304:
+            return True
+        if plan.action not in ("fetch", "revalidate") or status not in CACHEABLE_STATUSES:
+            return False
+        directives = parse_cache_control(headers.get("cache-control"))
+        if "no-store" in directives or headers.get("vary", "").strip() == "*":
+            return False
+        has_validator = headers.get("etag") or headers.get("last-modified")
+        return bool(has_validator) or freshness_lifetime(headers, time.time()) > 0
+
+    def complete(self, plan, status, headers, body):
+        """Store an upstream response, or refresh the entry a 304 confirmed; returns the entry to serve."""
+        now = time.time()
+        if plan.action == "revalidate" and status == 304:
+            merged = httpx.Headers(plan.entry.headers)
+            for name, value in headers.items():
+                if name.lower() not in BODY_HEADERS:
+                    merged[name] = value
+            entry = CachedResponse(plan.entry.status, list(merged.multi_items()), plan.entry.body, now,
+                                   now + freshness_lifetime(merged, now), plan.entry.vary)
+            self.count("not_modified")
+        else:
+            vary = [name.strip().lower() for name in headers.get("vary", "").split(",") if name.strip()]
+            request_headers = httpx.Headers(plan.request_headers or {})
+            entry = CachedResponse(status, list(headers.multi_items()), body, now,
+                                   now + freshness_lifetime(headers, now),
+                                   {name: request_headers.get(name) for name in vary})
+        self.put(plan.key, entry)
+        self.count("stores")
+        return entry
+
+    def stats(self):
+        with self.lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM responses").fetchone()
+            return {**self.counters, "memory_entries": len(self.memory), "disk_entries": entries, "disk_bytes": size}
+
+
+def _cached_response(entry, request):
+    return httpx.Response(entry.status, headers=entry.headers, content=entry.body, request=request)
+
+
+class CachingTransport(httpx.BaseTransport):
+    """httpx transport that serves requests through an UpstreamCache."""
+    def __init__(self, cache, transport=None):
+        self.cache = cache
+        self.transport = transport or httpx.HTTPTransport()
+
+    def handle_request(self, request):
+        plan = self.cache.plan(request.method, str(request.url), request.headers)
+        if plan.action == "fresh":
+            return _cached_response(plan.entry, request)
+        if plan.action == "revalidate":
+            request.headers.update(plan.conditional_headers())
+        response = self.transport.handle_request(request)
+        if plan.action == "bypass" or not self.cache.wants(plan, response.status_code, response.headers):
+            return response
+        try:
+            # The raw stream, so the stored body still matches Content-Encoding
+            body = b"".join(response.stream)
+        finally:
+            response.close()
+        return _cached_response(self.cache.complete(plan, response.status_code, response.headers, body), request)
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncCachingTransport(httpx.AsyncBaseTransport):
+    """Async ``CachingTransport``; SQLite work runs in a worker thread."""
+    def __init__(self, cache, transport=None):
+        self.cache = cache
+        self.transport = transport or httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request):
+        plan = await asyncio.to_thread(self.cache.plan, request.method, str(request.url), request.headers)
+        if plan.action == "fresh":
+            return _cached_response(plan.entry, request)
+        if plan.action == "revalidate":
+            request.headers.update(plan.conditional_headers())
+        response = await self.transport.handle_async_request(request)
+        if plan.action == "bypass" or not self.cache.wants(plan, response.status_code, response.headers):
+            return response
+        try:
+            body = b"".join([chunk async for chunk in response.stream])
+        finally:
+            await response.aclose()
+        entry = await asyncio.to_thread(self.cache.complete, plan, response.status_code, response.headers, body)
+        return _cached_response(entry, request)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide UpstreamCache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = UpstreamCache()
+        return _cache
@@ -0,0 +1,137 @@
+import json
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+import httpx
+
+# Headers that describe the original transfer rather than the payload
+HOP_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "connection", "keep-alive"}
+
+
+def path_of(url):
+    """Path plus query of a URL, the part a stub server matches on."""
+    url = httpx.URL(url)
+    return url.raw_path.decode("ascii")
+
+
+def fixture_from_response(response, recorded_at=None):
+    """One JSONL fixture line for an upstream response."""
+    request = response.request
+    return {
+        "host": request.url.host,
+        "method": request.method,
+        "path": path_of(request.url),
+        "status": response.status_code,
+        "headers": [[name, value] for name, value in response.headers.multi_items() if name.lower() not in HOP_HEADERS],
+        "body": response.text,
+        "recorded_at": (recorded_at or datetime.now(timezone.utc)).isoformat(),
+    }
+
+
+def load_fixtures(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_fixtures(fixtures, path):
+    with open(path, "w", encoding="utf-8") as f:
+        for fixture in fixtures:
+            f.write(json.dumps(fixture, ensure_ascii=False) + "\n")
+
+
+def replay_headers(fixture, now=None):
+    """The fixture's headers with Date and Expires moved to now, keeping the freshness they had."""
+    now = now or datetime.now(timezone.utc)
+    headers = [[name, value] for name, value in fixture["headers"] if name.lower() not in ("date", "expires")]
+    original = dict((name.lower(), value) for name, value in fixture["headers"])
+    headers.append(["Date", format_datetime(now, usegmt=True)])
+    if "expires" in original:
+        try:
+            sent = parsedate_to_datetime(original["date"]) if "date" in original \
+                else datetime.fromisoformat(fixture["recorded_at"])
+            lifetime = parsedate_to_datetime(original["expires"]) - sent
+        except (TypeError, ValueError):
+            lifetime = timedelta(0)
+        headers.append(["Expires", format_datetime(now + lifetime, usegmt=True)])
+    return headers
+
+
+class AsyncRecordingTransport(httpx.AsyncBaseTransport):
+    """Passes requests through and keeps a fixture for every response."""
+    def __init__(self, transport=None):
+        self.transport = transport or httpx.AsyncHTTPTransport()
+        self.fixtures = []
+
+    async def handle_async_request(self, request):
+        response = await self.transport.handle_async_request(request)
+        # aread() decodes the body, so the encoding headers no longer apply to it
+        content = await response.aread()
+        headers = [(name, value) for name, value in response.headers.multi_items() if name.lower() not in HOP_HEADERS]
+        recorded = httpx.Response(response.status_code, headers=headers, content=content, request=request)
+        self.fixtures.append(fixture_from_response(recorded))
+        return recorded
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _response_fixture(host, method, path, body, headers=(), status=200, now=None):
+    now = now or datetime.now(timezone.utc)
+    return {
+        "host": host,
+        "method": method,
+        "path": path,
+        "status": status,
+        "headers": [["Content-Type", "application/json"], ["Date", format_datetime(now, usegmt=True)], *headers],
+        "body": json.dumps(body),
+        "recorded_at": now.isoformat(),
+    }
+
+
+def sample_fixtures(latitude=52.52, longitude=13.405, database_id="bench-db", now=None):
+    """Synthetic fixtures shaped like the real upstream payloads, for runs without recordings."""
+    now = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+    timeseries = [{
+        "time": (now + timedelta(hours=hour)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "data": {
+            "instant": {"details": {"air_temperature": 8.0 + (hour % 24) * 0.4, "wind_speed": 3.5,
+                                    "ultraviolet_index_clear_sky": 1.0}},
+            "next_1_hours": {"summary": {"symbol_code": "cloudy"}, "details": {"precipitation_amount": 0.1}},
+            "next_6_hours": {"summary": {"symbol_code": "cloudy"}, "details": {"precipitation_amount": 0.4}},
+        },
+    } for hour in range(72)]
+    news = [{
+        "sourceId": f"bench-{i}",
+        "title": f"Article {i}",
+        "date": (now - timedelta(hours=i)).isoformat(),
+        "detailsweb": f"https://www.tagesschau.de/bench-{i}.html",
+        "content": [{"type": "text", "value": f"<p>Paragraph {j} of article {i}.</p>"} for j in range(12)],
+    } for i in range(30)]
+    pages = []
+    for i in range(200):
+        start = now + timedelta(days=i % 60 - 10, hours=i % 9)
+        pages.append({
+            "id": f"page-{i}",
+            "last_edited_time": now.strftime("%Y-%m-%dT%H:%M:%S.000Z"),
+            "archived": False,
+            "properties": {
+                "Action": {"title": [{"plain_text": f"Event {i}"}]},
+                "Date": {"date": {"start": start.strftime("%Y-%m-%dT%H:%M"),
+                                  "end": (start + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M")}},
+                "Description": {"rich_text": [{"plain_text": f"Description {i}"}]},
+            },
+        })
+    items = [{"id": str(1000 + i), "content": f"Task {i}", "priority": 1 + i % 4, "project_id": str(1 + i % 3),
+              "due": None, "child_order": i, "checked": False, "is_deleted": False} for i in range(150)]
+    projects = [{"id": str(i), "name": f"Project {i}", "child_order": i} for i in range(1, 4)]
+    expires = format_datetime(now + timedelta(minutes=30), usegmt=True)
+    return [
+        _response_fixture("api.met.no", "GET", f"/weatherapi/locationforecast/2.0/complete?lat={latitude}&lon={longitude}",
+                          {"properties": {"timeseries": timeseries}},
+                          headers=[["Expires", expires], ["Last-Modified", format_datetime(now, usegmt=True)]], now=now),
+        _response_fixture("tagesschau.de", "GET", "/api2u/homepage", {"news": news}, now=now),
+        _response_fixture("api.notion.com", "POST", f"/v1/databases/{database_id}/query",
+                          {"results": pages, "has_more": False, "next_cursor": None}, now=now),
+        _response_fixture("api.todoist.com", "POST", "/sync/v9/sync",
+                          {"sync_token": "bench", "full_sync": True, "items": items, "projects": projects}, now=now),
+    ]
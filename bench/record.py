@@ -0,0 +1,71 @@
+"""Record upstream responses into a JSONL fixture file for the benchmark.
+
+    python -m bench.record --out bench/fixtures/recorded.jsonl
+    python -m bench.record --sample --out bench/fixtures/sample.jsonl
+
+Recording calls the real yr, Tagesschau, Notion and Todoist APIs with the
+keys from .env, through the connectors themselves, so the fixtures hold
+exactly the requests the app makes. They contain your tasks and events;
+keep them out of version control. ``--sample`` writes synthetic fixtures
+instead and needs no network.
+"""
+import os
+import argparse
+import asyncio
+import tempfile
+
+import httpx
+from dotenv import load_dotenv
+
+from bench.fixtures import AsyncRecordingTransport, sample_fixtures, save_fixtures
+
+
+async def record(latitude, longitude):
+    from APIs.WeatherAPI.hookup_api import WeatherAPI
+    from APIs.NewsAPI.fetch_news import TagesSchaueClient
+    from APIs.NotionAPI.hookup_api import ConnectNotionAPI
+    from APIs.TodoistAPI.todoist_mirror import TodoistMirror
+
+    transport = AsyncRecordingTransport()
+    # A plain client: the upstream cache would answer some requests without recording them
+    async with httpx.AsyncClient(transport=transport, follow_redirects=True, timeout=30) as client:
+        steps = {
+            "weather": WeatherAPI().async_fetch_snapshot(latitude, longitude, client=client),
+            "news": TagesSchaueClient().async_get_articles(client=client),
+            "notion": _drain(ConnectNotionAPI().async_iter_pages(None, client)),
+        }
+        with tempfile.TemporaryDirectory() as directory:
+            steps["todoist"] = TodoistMirror(path=os.path.join(directory, "mirror.db")).sync(client=client)
+            for name, step in steps.items():
+                try:
+                    await step
+                except Exception as e:
+                    print(f"Could not record {name}: {e}")
+    return transport.fixtures
+
+
+async def _drain(pages):
+    async for _ in pages:
+        pass
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--sample", action="store_true", help="write synthetic fixtures, no network")
+    parser.add_argument("--latitude", default=os.environ.get("LATITUDE", "52.5200"))
+    parser.add_argument("--longitude", default=os.environ.get("LONGITUDE", "13.4050"))
+    args = parser.parse_args()
+
+    if args.sample:
+        fixtures = sample_fixtures(float(args.latitude), float(args.longitude))
+    else:
+        fixtures = asyncio.run(record(args.latitude, args.longitude))
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    save_fixtures(fixtures, args.out)
+    print(f"Wrote {len(fixtures)} fixtures to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
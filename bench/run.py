@@ -0,0 +1,189 @@
+"""Offline load benchmark against local stub upstreams.
+
+    python -m bench.run
+    python -m bench.run --fixtures bench/fixtures/recorded.jsonl --latency 0.08 --concurrency 1,16,64
+
+Starts one stub server per upstream host from the fixtures (synthetic ones
+by default), runs the app with uvicorn in a subprocess whose connectors are
+pointed at the stubs through UPSTREAM_OVERRIDES, and drives each endpoint at
+each concurrency level. Reports p50/p95/p99 latency, throughput and the
+upstream calls each run caused; ``--json`` also writes the rows to a file
+for comparing runs.
+"""
+import os
+import sys
+import json
+import math
+import time
+import socket
+import argparse
+import asyncio
+import tempfile
+import subprocess
+from urllib.parse import urlsplit
+
+import httpx
+
+from bench.fixtures import load_fixtures, sample_fixtures
+from bench.stubs import overrides_for, start_stubs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ENDPOINTS = ["/api/weather", "/api/news", "/api/tasks", "/api/events"]
+STARTUP_TIMEOUT = 60
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[rank]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def app_environment(fixtures, stubs, directory):
+    """Environment for the app under test: stubbed upstreams, throwaway databases."""
+    env = dict(os.environ)
+    env.update({
+        "UPSTREAM_OVERRIDES": overrides_for(stubs),
+        "UPSTREAM_CACHE_PATH": os.path.join(directory, "upstream_cache.db"),
+        "TODOIST_MIRROR_PATH": os.path.join(directory, "todoist_mirror.db"),
+        "NOTION_CACHE_PATH": os.path.join(directory, "notion_events.db"),
+        "NEWS_DB_PATH": os.path.join(directory, "news.db"),
+        "td_api_key": "bench",
+        "NOTION_TOKEN": "bench",
+        # Only the requests under test should reach the stubs
+        "TODOIST_SYNC_SECONDS": "3600",
+        "NOTION_SYNC_SECONDS": "3600",
+    })
+    for fixture in fixtures:
+        path = urlsplit(fixture["path"]).path
+        if fixture["host"] == "api.notion.com" and path.startswith("/v1/databases/"):
+            env["NOTION_DB_TOKE"] = path.split("/")[3]
+        if fixture["host"] == "api.met.no":
+            query = dict(part.split("=", 1) for part in urlsplit(fixture["path"]).query.split("&") if "=" in part)
+            env.setdefault("LATITUDE", query.get("lat", "52.5200"))
+            env.setdefault("LONGITUDE", query.get("lon", "13.4050"))
+    return env
+
+
+def start_app(env, port):
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env,
+    )
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"The app exited during startup with code {process.returncode}")
+        try:
+            # Ready means the warmup has filled the mirrors, so runs measure the steady state
+            if httpx.get(f"http://127.0.0.1:{port}/api/health/ready", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"The app did not start within {STARTUP_TIMEOUT}s")
+
+
+async def drive(client, url, requests, concurrency):
+    """Send ``requests`` GETs with ``concurrency`` in flight; returns (latencies, errors, seconds)."""
+    latencies, errors = [], 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await client.get(url)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return sorted(latencies), errors, time.perf_counter() - started
+
+
+async def run(base_url, endpoints, levels, requests, stubs):
+    rows = []
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # The first request per endpoint is reported on its own, it pays any first-use costs
+        runs = [(endpoint, "cold", 1, 1) for endpoint in endpoints]
+        runs += [(endpoint, "warm", concurrency, requests) for endpoint in endpoints for concurrency in levels]
+        for endpoint, phase, concurrency, count in runs:
+            before = {host: stub.total_calls() for host, stub in stubs.items()}
+            latencies, errors, seconds = await drive(client, endpoint, count, concurrency)
+            upstream = {host: stub.total_calls() - before[host] for host, stub in stubs.items()}
+            rows.append({
+                "endpoint": endpoint,
+                "phase": phase,
+                "concurrency": concurrency,
+                "requests": count,
+                "errors": errors,
+                "p50_ms": percentile(latencies, 50) * 1000,
+                "p95_ms": percentile(latencies, 95) * 1000,
+                "p99_ms": percentile(latencies, 99) * 1000,
+                "throughput_rps": count / seconds if seconds else float("nan"),
+                "upstream_calls": {host: calls for host, calls in upstream.items() if calls},
+            })
+    return rows
+
+
+def print_table(rows):
+    header = f"{'endpoint':<22}{'phase':>6}{'conc':>6}{'reqs':>7}{'err':>5}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'req/s':>9}  upstream calls"
+    print(header)
+    print("-" * len(header))
+    for row in rows:
+        upstream = ", ".join(f"{host}={calls}" for host, calls in row["upstream_calls"].items()) or "-"
+        print(f"{row['endpoint']:<22}{row['phase']:>6}{row['concurrency']:>6}{row['requests']:>7}{row['errors']:>5}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}{row['throughput_rps']:>9.0f}  {upstream}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fixtures", help="JSONL fixtures from bench.record (default: synthetic)")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds every stub answer is delayed")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random delay of up to this many seconds")
+    parser.add_argument("--host-latency", action="append", default=[], metavar="HOST=SECONDS",
+                        help="latency for one upstream host, e.g. api.notion.com=0.3")
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint and concurrency level")
+    parser.add_argument("--endpoints", default=",".join(DEFAULT_ENDPOINTS))
+    parser.add_argument("--json", help="also write the result rows to this file")
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures else sample_fixtures()
+    latencies = {host: float(seconds) for host, seconds in (entry.split("=", 1) for entry in args.host_latency)}
+    levels = [int(level) for level in args.concurrency.split(",")]
+    endpoints = [endpoint.strip() for endpoint in args.endpoints.split(",") if endpoint.strip()]
+
+    stubs = start_stubs(fixtures, args.latency, args.jitter, latencies)
+    port = free_port()
+    with tempfile.TemporaryDirectory() as directory:
+        process = start_app(app_environment(fixtures, stubs, directory), port)
+        try:
+            rows = asyncio.run(run(f"http://127.0.0.1:{port}", endpoints, levels, args.requests, stubs))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            for stub in stubs.values():
+                stub.stop()
+    print_table(rows)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import json
+import time
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from bench.fixtures import replay_headers
+
+
+class StubUpstream:
+    """A local HTTP server answering one provider's requests from recorded fixtures.
+
+    Requests match a fixture on method and path plus query, falling back to
+    the path alone (so other coordinates still get the recorded forecast).
+    Every answer is delayed by ``latency`` seconds plus up to ``jitter``. A
+    conditional request whose If-Modified-Since equals the fixture's
+    Last-Modified gets a 304, as yr would send.
+    """
+    def __init__(self, host, fixtures, latency=0.0, jitter=0.0, port=0):
+        self.host = host
+        self.latency = latency
+        self.jitter = jitter
+        self.calls = Counter()
+        self.lock = threading.Lock()
+        self.exact = {}
+        self.by_path = {}
+        for fixture in fixtures:
+            self.exact.setdefault((fixture["method"], fixture["path"]), fixture)
+            self.by_path.setdefault((fixture["method"], urlsplit(fixture["path"]).path), fixture)
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def match(self, method, path):
+        return self.exact.get((method, path)) or self.by_path.get((method, urlsplit(path).path))
+
+    def count(self, method, path):
+        with self.lock:
+            self.calls[f"{method} {urlsplit(path).path}"] += 1
+
+    def total_calls(self):
+        with self.lock:
+            return sum(self.calls.values())
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _answer(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                if length:
+                    self.rfile.read(length)
+                stub.count(self.command, self.path)
+                if stub.latency or stub.jitter:
+                    time.sleep(stub.latency + random.uniform(0, stub.jitter))
+                fixture = stub.match(self.command, self.path)
+                if fixture is None:
+                    self._send(404, [["Content-Type", "text/plain"]], b"No fixture for this request")
+                    return
+                headers = replay_headers(fixture)
+                last_modified = dict((name.lower(), value) for name, value in headers).get("last-modified")
+                if last_modified and self.headers.get("If-Modified-Since") == last_modified:
+                    self._send(304, [header for header in headers if header[0].lower() != "content-type"], b"")
+                    return
+                self._send(fixture["status"], headers, fixture["body"].encode("utf-8"))
+
+            def _send(self, status, headers, body):
+                self.send_response(status)
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _answer
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class StubTodoist:
+    """A local, stateful stand-in for Todoist's Sync API, for TodoistMirror.
+
+    Unlike StubUpstream it applies the item_add, item_close and item_update
+    commands it receives and answers every sync with what changed since the
+    ``sync_token`` sent, as Todoist does: everything for "*", otherwise only
+    the items touched since. ``sync_url`` is what the mirror is pointed at;
+    ``requests`` keeps the decoded form of every request for assertions.
+    """
+    def __init__(self, items=(), projects=(), port=0):
+        self.lock = threading.Lock()
+        self.version = 1
+        self.next_id = 1000
+        self.items = {str(item["id"]): dict(item, checked=False, is_deleted=False, version=1) for item in items}
+        self.projects = {str(project["id"]): dict(project) for project in projects}
+        self.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def sync_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}/sync/v9/sync"
+
+    def edit(self, item_id, **fields):
+        """Change an item as if it was edited in another Todoist client."""
+        with self.lock:
+            self.version += 1
+            self.items[str(item_id)].update(fields, version=self.version)
+
+    def sync(self, form):
+        with self.lock:
+            self.requests.append(form)
+            token = form.get("sync_token", "*")
+            since = 0 if token == "*" else int(token)
+            sync_status, temp_id_mapping = {}, {}
+            for command in json.loads(form.get("commands", "[]")):
+                self.version += 1
+                sync_status[command["uuid"]] = self._apply(command, temp_id_mapping)
+            changed = [self._public(item) for item in self.items.values() if item["version"] > since]
+            return {
+                "sync_token": str(self.version),
+                "full_sync": since == 0,
+                "items": changed,
+                "projects": list(self.projects.values()) if since == 0 else [],
+                "sync_status": sync_status,
+                "temp_id_mapping": temp_id_mapping,
+            }
+
+    def _apply(self, command, temp_id_mapping):
+        args = command["args"]
+        if command["type"] == "item_add":
+            self.next_id += 1
+            item_id = str(self.next_id)
+            self.items[item_id] = {"id": item_id, "content": args.get("content", ""), "priority": args.get("priority", 1),
+                                   "project_id": "1", "due": args.get("due"), "child_order": len(self.items),
+                                   "checked": False, "is_deleted": False, "version": self.version}
+            temp_id_mapping[command["temp_id"]] = item_id
+            return "ok"
+        # Later commands of the same request may refer to an added item by its temp_id
+        item = self.items.get(str(temp_id_mapping.get(args.get("id"), args.get("id"))))
+        if item is None:
+            return {"error": "Item not found", "error_code": 22}
+        if command["type"] == "item_close":
+            item.update(checked=True, version=self.version)
+        elif command["type"] == "item_update":
+            item.update({key: value for key, value in args.items() if key != "id"}, version=self.version)
+        else:
+            return {"error": f"Unsupported command {command['type']}", "error_code": 1}
+        return "ok"
+
+    @staticmethod
+    def _public(item):
+        return {key: value for key, value in item.items() if key != "version"}
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                body = json.dumps(stub.sync(form)).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def start_stubs(fixtures, latency=0.0, jitter=0.0, latencies=None):
+    """One started StubUpstream per host in ``fixtures``; ``latencies`` overrides ``latency`` per host."""
+    by_host = {}
+    for fixture in fixtures:
+        by_host.setdefault(fixture["host"], []).append(fixture)
+    latencies = latencies or {}
+    return {host: StubUpstream(host, host_fixtures, latencies.get(host, latency), jitter).start()
+            for host, host_fixtures in by_host.items()}
+
+
+def overrides_for(stubs):
+    """The UPSTREAM_OVERRIDES value sending each stubbed host to its server."""
+    return ";".join(f"{host}={stub.url}" for host, stub in stubs.items())
@@ -1,23 +1,155 @@
 
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from APIs.TodoistAPI.hookup_api import ConnectTodoistAPI
+import time
+# Startup phases are timed from here, before the heavy imports below
+IMPORT_STARTED = time.perf_counter()
+
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional
+from APIs.TodoistAPI.todoist_mirror import TodoistMirror
 from APIs.NotionAPI.hookup_api import ConnectNotionAPI
-from APIs.WeatherAPI.hookup_api import WeatherAPI
+from APIs.NotionAPI.event_cache import NotionEventCache
+from APIs.WeatherAPI.hookup_api import WeatherAPI, normalize_coordinates, async_refresh_forecasts, forecast_listeners
 from APIs.NewsAPI.fetch_news import TagesSchaueClient
+from APIs.NewsAPI.news_database import NewsDatabase
+from APIs.NewsAPI.summary_worker import WORKER_MODE, ensure_worker, stop_worker, worker_running
+from APIs.http_client import start_client, close_client
+from APIs.upstream_cache import get_cache
+from APIs.resilience import breaker_states, is_degraded
+from APIs import metrics
 import uvicorn
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.encoders import jsonable_encoder
 import os 
 from dotenv import load_dotenv
-import sqlite3
+import asyncio
+import base64
+import hashlib
+import threading
+import logging
+import json
+import uuid
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
 from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import numpy as np
 
 load_dotenv()
 
 
-
-app = FastAPI()
+class StartupTracker:
+    """Timings of the startup phases and of the background warmup after them.
+
+    Startup only does what must happen before the first request. Syncing
+    the mirrors, the first forecast and the news refresh run as warmup
+    tasks while the app already serves. The app is ready once every
+    ``required`` warmup phase has finished, successfully or not; the news
+    refresh is not required, /api/news serves the last stored articles.
+    """
+    def __init__(self, started):
+        self.started = started
+        self.phases = {}
+        self.required = set()
+        self.serving_since = None
+        # Keeps warmup tasks referenced until they finish
+        self.tasks = set()
+
+    def _record(self, name, state, seconds=None, error=None):
+        self.phases[name] = {"state": state, "seconds": seconds, "error": error}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        self._record(name, "running")
+        try:
+            yield
+        except BaseException as e:
+            self._record(name, "failed", time.perf_counter() - started, str(e))
+            raise
+        self._record(name, "done", time.perf_counter() - started)
+
+    def warm(self, name, fetch, required=True):
+        """Run ``fetch()`` as a background warmup phase."""
+        async def run():
+            started = time.perf_counter()
+            self._record(name, "running")
+            try:
+                await fetch()
+                self._record(name, "done", time.perf_counter() - started)
+            except Exception as e:
+                self._record(name, "failed", time.perf_counter() - started, str(e))
+                logging.warning(f"Warmup {name} failed after {self.phases[name]['seconds']:.2f}s: {e}")
+                return
+            logging.info(f"Warmup {name} done in {self.phases[name]['seconds']:.2f}s")
+
+        if required:
+            self.required.add(name)
+        self._record(name, "pending")
+        task = asyncio.create_task(run())
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    @property
+    def is_ready(self):
+        return self.serving_since is not None and all(
+            self.phases[name]["state"] in ("done", "failed") for name in self.required
+        )
+
+    def report(self):
+        return {
+            "ready": self.is_ready,
+            "serving_after_seconds": None if self.serving_since is None else self.serving_since - self.started,
+            "phases": self.phases,
+        }
+
+startup = StartupTracker(IMPORT_STARTED)
+
+async def warm_news():
+    await asyncio.to_thread(news_cache.reset, news_db.last_update)
+    if news_db.is_update_needed():
+        await fetch_and_update_news()
+    elif await asyncio.to_thread(outstanding_summaries):
+        # Jobs queued before a restart
+        ensure_worker()
+        watch_summaries_in_background()
+
+@asynccontextmanager
+async def lifespan(app):
+    startup._record("import", "done", time.perf_counter() - IMPORT_STARTED)
+    with startup.phase("http_client"):
+        # One pooled HTTP client for every connector, for as long as the app runs
+        await start_client()
+    broker.attach(asyncio.get_running_loop())
+    with startup.phase("news_schema"):
+        news_db.create_schema()
+        if WORKER_MODE == 'spawn':
+            # Jobs claimed by a worker that died with the previous run (e.g. killed on deploy)
+            news_db.release_summary_jobs()
+    with startup.phase("scheduler"):
+        scheduler = AsyncIOScheduler()
+        scheduler.add_job(fetch_and_update_news, 'cron', hour=8)  # Jeden Tag um Mitternacht ausführen
+        scheduler.add_job(todoist_mirror.sync_quietly, 'interval', seconds=TODOIST_SYNC_SECONDS, max_instances=1)
+        scheduler.add_job(notion_cache.sync_quietly, 'interval', seconds=NOTION_SYNC_SECONDS, args=[ConnectNotionAPI], max_instances=1)
+        # Keep the forecasts warm so /api/weather never waits on yr
+        scheduler.add_job(async_refresh_forecasts, 'interval', minutes=1, max_instances=1)
+        scheduler.start()
+    startup.warm("todoist", lambda: todoist_mirror.sync())
+    startup.warm("notion", lambda: notion_cache.sync(ConnectNotionAPI()))
+    startup.warm("weather", async_refresh_forecasts)
+    startup.warm("news", warm_news, required=False)
+    startup.serving_since = time.perf_counter()
+    logging.info(f"Serving after {startup.serving_since - IMPORT_STARTED:.2f}s, warming up in the background")
+    yield
+    scheduler.shutdown(wait=False)
+    for task in list(startup.tasks) + list(summary_watch_tasks):
+        task.cancel()
+    await asyncio.to_thread(stop_worker, news_db)
+    await close_client()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -25,12 +157,75 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Age", "ETag", "X-Next-Cursor", "X-Refresh-In-Progress", "X-Stale", "Server-Timing"],
+)
+
+# Upstream provider behind each path prefix; while its circuit breaker is not
+# closed the data served there is the last known good state
+STALE_PATH_PROVIDERS = {
+    "/api/tasks": "todoist",
+    "/api/events": "notion",
+    "/api/weather": "weather",
+    "/api/news": "tagesschau",
+}
+
+def news_is_stale():
+    # last_update only moves on a successful refresh, so after failed ones it keeps aging
+    return news_db.last_update is not None and news_db.is_update_needed()
+
+# Providers whose data can be stale while their breaker is closed, e.g. after refreshes that failed
+STALENESS_CHECKS = {"tagesschau": news_is_stale}
+
+def is_stale(provider):
+    check = STALENESS_CHECKS.get(provider)
+    return is_degraded(provider) or (check is not None and check())
+
+@app.middleware("http")
+async def mark_stale_responses(request: Request, call_next):
+    response = await call_next(request)
+    for prefix, provider in STALE_PATH_PROVIDERS.items():
+        if request.url.path.startswith(prefix):
+            response.headers["X-Stale"] = "true" if is_stale(provider) else "false"
+            break
+    return response
+
+REQUEST_LATENCY = metrics.Histogram(
+    "http_request_duration_seconds", "Time until the response headers were ready", ("method", "route", "status")
 )
+# Requests sending this header get a Server-Timing breakdown of where their time went
+TIMING_REQUEST_HEADER = "X-Timing-Breakdown"
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    breakdown = metrics.start_breakdown() if request.headers.get(TIMING_REQUEST_HEADER) else None
+    started = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    # The route template, not the path, so ids do not blow up the label set
+    route = request.scope.get("route")
+    REQUEST_LATENCY.observe(elapsed, method=request.method, route=route.path if route else "unmatched",
+                            status=str(response.status_code))
+    if breakdown is not None:
+        response.headers["Server-Timing"] = metrics.server_timing(breakdown, elapsed)
+    return response
+
+
 class Wetter(BaseModel):
     temperature: float
     unit: str = "°C"  
     todays_suggestion: str = "No suggestion available"
     tomorrows_suggestion: str = "No suggestion available"
+    # The forecast expired and could not be renewed; this is the last one yr delivered
+    stale: bool = False
+
+class Location(BaseModel):
+    latitude: float = Field(ge=-90, le=90)
+    longitude: float = Field(ge=-180, le=180)
+
+class LocationWetter(BaseModel):
+    latitude: float
+    longitude: float
+    weather: Optional[Wetter] = None
 
 class News(BaseModel):
     title: str
@@ -44,184 +239,672 @@ class Task(BaseModel):
     priority: int
     project_id: int 
     
+class TaskOperation(BaseModel):
+    type: Literal["add", "close", "update"]
+    task_id: Optional[str] = None
+    temp_id: Optional[str] = None
+    content: Optional[str] = None
+    priority: Optional[int] = None
+    due_string: Optional[str] = None
+
+class TaskOperationResult(BaseModel):
+    index: int
+    type: str
+    status: str
+    task_id: Optional[str] = None
+    error: Optional[str] = None
+
 class NotionEvent(BaseModel):
     id: int
     event_name: str
     event_date: str
+    start: datetime
+    end: datetime
     description: str
+
+class DashboardSection(BaseModel):
+    data: Any = None
+    stale: bool = False
+    updated_at: Optional[datetime] = None
+    error: Optional[str] = None
+
+class DashboardSnapshot(BaseModel):
+    generated_at: datetime
+    sections: dict[str, DashboardSection]
     
 
+############## Push stream ##############
+STREAM_BUFFER_SIZE = int(os.environ.get('STREAM_BUFFER_SIZE', 256))
+STREAM_KEEPALIVE_SECONDS = 15
+# A subscriber this many events behind is dropped; it reconnects and catches up from the buffer
+STREAM_QUEUE_SIZE = 100
+
+def format_sse(event_id, event_type, data):
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(jsonable_encoder(data))}\n\n"
+
+class EventBroker:
+    """Typed delta events for /api/stream, with replay for reconnecting clients.
+
+    Event ids are "<boot>-<seq>". The last ``size`` events are kept in a ring
+    buffer, so a client that reconnects with Last-Event-ID receives what it
+    missed. If the id is from an earlier process or already evicted, the
+    client gets a single "reset" event and should refetch everything.
+    """
+    def __init__(self, size=STREAM_BUFFER_SIZE):
+        self.boot = uuid.uuid4().hex[:8]
+        self.seq = 0
+        self.buffer = deque(maxlen=size)
+        self.subscribers = set()
+        self.loop = None
+
+    def attach(self, loop):
+        self.loop = loop
+
+    def publish(self, event_type, data):
+        """Queue an event for every subscriber; safe to call from any thread."""
+        if self.loop is None:
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            self._publish(event_type, data)
+        else:
+            self.loop.call_soon_threadsafe(self._publish, event_type, data)
+
+    def _publish(self, event_type, data):
+        self.seq += 1
+        message = format_sse(f"{self.boot}-{self.seq}", event_type, data)
+        self.buffer.append((self.seq, message))
+        for queue in list(self.subscribers):
+            try:
+                queue.put_nowait(message)
+            except asyncio.QueueFull:
+                # Too slow: end its stream, the reconnect replays from the buffer
+                self.subscribers.discard(queue)
+                queue.get_nowait()
+                queue.put_nowait(None)
+
+    def replay(self, last_event_id):
+        if not last_event_id:
+            return []
+        boot, _, seq = last_event_id.partition("-")
+        oldest = self.buffer[0][0] if self.buffer else self.seq + 1
+        if boot != self.boot or not seq.isdigit() or int(seq) > self.seq or int(seq) < oldest - 1:
+            return [format_sse(f"{self.boot}-{self.seq}", "reset", {})]
+        return [message for number, message in self.buffer if number > int(seq)]
+
+    def subscribe(self, last_event_id=None):
+        """Return a queue of future events and the missed ones to send first."""
+        queue = asyncio.Queue(STREAM_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue, self.replay(last_event_id)
+
+    def unsubscribe(self, queue):
+        self.subscribers.discard(queue)
+
+broker = EventBroker()
+
+@app.get("/api/stream")
+async def stream_events(last_event_id: Optional[str] = Header(None)):
+    """Server-Sent Events: task.added/updated/closed, tasks.reset, events.changed,
+    news.refreshed and forecast.updated."""
+    queue, backlog = broker.subscribe(last_event_id)
+
+    async def events():
+        try:
+            yield "retry: 3000\n\n"
+            for message in backlog:
+                yield message
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                if message is None:
+                    break
+                yield message
+        finally:
+            broker.unsubscribe(queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+def publish_forecast(snapshot):
+    summary = WeatherAPI().forecast_summary(snapshot)
+    broker.publish("forecast.updated", {"latitude": snapshot.latitude, "longitude": snapshot.longitude,
+                                        "weather": summary})
+
+forecast_listeners.append(publish_forecast)
+
+
 ############## Todoist API ##############
 
+TODOIST_SYNC_SECONDS = int(os.environ.get('TODOIST_SYNC_SECONDS', 30))
+
+def to_task(task) -> Task:
+    return Task(id=task['id'],  # Use task['id'] for the correct ID
+                task=task['content'],
+                priority=task.get('priority', 1),
+                project_id=task['project_id'])
+
+def publish_task_deltas(payload):
+    if payload.get("full_sync"):
+        broker.publish("tasks.reset", {})
+        return
+    added = {str(task_id) for task_id in payload.get("temp_id_mapping", {}).values()}
+    for item in payload.get("items", []):
+        if item.get("is_deleted") or item.get("checked"):
+            broker.publish("task.closed", {"id": str(item["id"])})
+            continue
+        try:
+            task = to_task(item)
+        except (KeyError, ValueError):
+            continue
+        broker.publish("task.added" if str(item["id"]) in added else "task.updated", task)
+
+todoist_mirror = TodoistMirror(on_sync=publish_task_deltas)
+
 @app.get("/api/tasks", response_model=list[Task])
-def get_todoist_tasks():
-    api = ConnectTodoistAPI()
-    tasks = api.assemble_tasks()
-    print(tasks)
-    task_list = []
-    for task in tasks:
-        task_list.append(Task(id=task['id'],  # Use task['id'] for the correct ID
-                                task=task['content'], 
-                                priority=task['priority'], 
-                                project_id=task['project_id']))
-    return task_list
+async def get_todoist_tasks():
+    # Served from the mirror; the scheduler keeps it in sync with Todoist. Only an
+    # empty mirror (never synced, not even before a restart) waits for a full sync
+    if not await asyncio.to_thread(lambda: todoist_mirror.is_synced):
+        await todoist_mirror.sync_quietly()
+    # SQLite reads run in the threadpool so a slow query never stalls the event loop
+    return [to_task(task) for task in await asyncio.to_thread(todoist_mirror.get_tasks)]
+
+async def run_task_operation(operation):
+    # Single mutations are one-command Sync API batches, which also update the mirror
+    result, = await todoist_mirror.batch([operation])
+    if result["status"] != "ok":
+        raise HTTPException(status_code=502, detail=f"Todoist rejected the {operation['type']}: {result['error']}")
+    return result
 
 @app.post("/api/todoist/remove/{task_id}")
-def remove_task(task_id: int):
-    print(f"Received task_id: {task_id}")  # Log the received task_id
-    api = ConnectTodoistAPI()
-    api.mark_task(task_id=task_id)
+async def remove_task(task_id: int):
+    await run_task_operation({"type": "close", "task_id": task_id})
     return {"message": f"Task {task_id} removed successfully"}
 
         
 
 @app.post("/api/todoist/add")
-def add_task(task: Task):
-    api = ConnectTodoistAPI()
-    api.add_task(task.task, priority = task.priority)
+async def add_task(task: Task):
+    await run_task_operation({"type": "add", "content": task.task, "priority": task.priority})
 
     return {"message": "Task added successfully"}
 
 
 
+@app.post("/api/todoist/batch", response_model=list[TaskOperationResult])
+async def batch_tasks(operations: list[TaskOperation]):
+    for index, operation in enumerate(operations):
+        if operation.type != "add" and not operation.task_id:
+            raise HTTPException(status_code=400, detail=f"Operation {index} ({operation.type}) needs a task_id")
+    results = await todoist_mirror.batch([operation.model_dump() for operation in operations])
+    return [TaskOperationResult(index=index, type=operation.type, **result)
+            for index, (operation, result) in enumerate(zip(operations, results))]
+
+
 ############## Weather API ##############
 @app.get("/api/weather", response_model=Wetter)
-def get_weather():
+async def get_weather():
     api = WeatherAPI()
     latitude = os.environ.get('LATITUDE', '52.5200')  # Standardwert für Berlin
     longitude = os.environ.get('LONGITUDE', '13.4050')  # Standardwert für Berlin
-    temperature = api.get_air_temperature(latitude, longitude)
+    summary = await api.async_get_weather_summary(latitude, longitude)
+    if summary is None:
+        raise HTTPException(status_code=502, detail="Unable to retrieve the forecast")
+    return Wetter(unit="°C", **summary)
 
-    suggestion = api.suggest_clothing(latitude, longitude)
-    tmrw_suggestion = api.suggest_clothing_for_tomorrow(latitude, longitude)
-    return Wetter(temperature=temperature, unit="°C", todays_suggestion=suggestion, tomorrows_suggestion=tmrw_suggestion)
+MAX_BATCH_LOCATIONS = 100
+
+@app.post("/api/weather/batch", response_model=list[LocationWetter])
+async def get_weather_batch(locations: list[Location]):
+    if len(locations) > MAX_BATCH_LOCATIONS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_LOCATIONS} locations per request")
+    api = WeatherAPI()
+    coordinates = [normalize_coordinates(location.latitude, location.longitude) for location in locations]
+    summaries = await api.async_get_weather_batch(coordinates)
+    return [LocationWetter(latitude=latitude,
+                           longitude=longitude,
+                           weather=Wetter(unit="°C", **summaries[(latitude, longitude)]) if summaries[(latitude, longitude)] else None)
+            for latitude, longitude in coordinates]
+
+# yr's complete forecast reaches about nine days ahead
+MAX_HOURLY_HOURS = 240
+
+@app.get("/api/weather/hourly")
+async def get_hourly_weather(hours: Optional[int] = Query(None, ge=1, le=MAX_HOURLY_HOURS)):
+    api = WeatherAPI()
+    latitude = os.environ.get('LATITUDE', '52.5200')
+    longitude = os.environ.get('LONGITUDE', '13.4050')
+    columns = await api.async_get_hourly_forecast(latitude, longitude, hours=hours)
+    if columns is None:
+        raise HTTPException(status_code=502, detail="Unable to retrieve the forecast")
+    # NaN marks values yr does not provide for a step (e.g. UV far ahead, or the hourly
+    # precipitation where yr only forecasts six-hour amounts)
+    columns = {name: np.where(np.isnan(values), None, values).tolist() if values.dtype.kind == 'f' else values.tolist()
+               for name, values in columns.items()}
+    # One object per time step, serialized straight from the columns without a model per row
+    rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+    return Response(content=json.dumps(rows), media_type="application/json")
 
 ############## Notion API ##############
-@app.get("/api/events", response_model=list[NotionEvent])
-def get_notion_events():
-    api = ConnectNotionAPI()
-    try:
-        # Fetch data from Notion API
-        pages = api.get_pages()
-        event_names = api.extract_event_name(pages)
-        event_dates = api.extract_event_date(pages)
-        descriptions = api.extract_description(pages)
+NOTION_SYNC_SECONDS = int(os.environ.get('NOTION_SYNC_SECONDS', 60))
+notion_cache = NotionEventCache(
+    on_change=lambda changed, removed: broker.publish("events.changed", {"changed": changed, "removed": removed})
+)
 
-        event_list = []
-        
-        # Safely iterate over event names, dates, and descriptions
-        for i, (event_name, event_date, description) in enumerate(zip(event_names, event_dates, descriptions)):
-            # Handle different date formats (e.g., when start and end dates differ)
-            if len(event_date) == 3:
-                event_date_str = f"{event_date[0]} {event_date[1]} - {event_date[2]}"
-            elif len(event_date) == 4:
-                event_date_str = f"{event_date[0]} {event_date[1]} to {event_date[2]} {event_date[3]}"
-            else:
-                event_date_str = "Invalid date format"
-            
-
-            if not description:
-                description = "No description available"
-            
-            # Append the event to the list
-            event_list.append(
-                NotionEvent(
-                    id=i,
-                    event_name=event_name, 
-                    event_date=event_date_str,  # Pass the formatted string here
-                    description=description
-                )
-            )
-        
-        return event_list
-
-    except Exception as e:
-        # Catch and log any unexpected errors
-        raise HTTPException(status_code=500, detail=f"Error fetching events: {str(e)}")
-
-
-
-DATABASE_NAME = "news.db"
-
-def create_database():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS articles (
-        id INTEGER PRIMARY KEY,
-        title TEXT,
-        date TEXT,
-        text_content TEXT,
-        link TEXT
-    )
-    ''')
-    cursor.execute('''
-    CREATE TABLE IF NOT EXISTS last_update (
-        id INTEGER PRIMARY KEY,
-        timestamp TEXT
-    )
-    ''')
-    conn.commit()
-    conn.close()
-
-def insert_articles(articles):
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM articles")  # Alte Artikel löschen
-    for article in articles:
-        cursor.execute('''
-        INSERT INTO articles (title, date, text_content, link)
-        VALUES (?, ?, ?, ?)
-        ''', (article['title'], article['date'], article['text_content'], article['link']))
-    cursor.execute("DELETE FROM last_update")
-    cursor.execute("INSERT INTO last_update (timestamp) VALUES (?)", (datetime.now().isoformat(),))
-    conn.commit()
-    conn.close()
-
-def get_cached_articles():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT title, date, text_content, link FROM articles")
-    articles = [{"title": row[0], "date": row[1], "text_content": row[2], "link": row[3]} for row in cursor.fetchall()]
-    conn.close()
-    return articles
+MAX_UPCOMING_EVENTS = 100
+
+async def ensure_events_synced():
+    # Served from the local cache; the scheduler pulls Notion's changes into it
+    if not await asyncio.to_thread(lambda: notion_cache.is_synced):
+        try:
+            await notion_cache.sync(ConnectNotionAPI())
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Error fetching events: {str(e)}")
+
+def local_time(value: datetime) -> datetime:
+    # Events are indexed in naive local time, as Notion shows them
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
 
-def is_update_needed():
-    conn = sqlite3.connect(DATABASE_NAME)
-    cursor = conn.cursor()
-    cursor.execute("SELECT timestamp FROM last_update")
-    result = cursor.fetchone()
-    conn.close()
-    if not result:
-        return True
-    last_update = datetime.fromisoformat(result[0])
-    return datetime.now() - last_update > timedelta(days=1)
-
-def fetch_and_update_news():
+def to_notion_events(events) -> list[NotionEvent]:
+    return [NotionEvent(id=i, event_name=event.name, event_date=event.date_label, start=event.start,
+                        end=event.end, description=event.description)
+            for i, event in enumerate(events)]
+
+@app.get("/api/events", response_model=list[NotionEvent])
+async def get_notion_events(start: Optional[datetime] = Query(None, alias="from"),
+                      end: Optional[datetime] = Query(None, alias="to")):
+    """All events, or with ``from``/``to`` only those overlapping that window."""
+    await ensure_events_synced()
+    index = notion_cache.index
+    if start is None and end is None:
+        return to_notion_events(index.events)
+    start = local_time(start) if start else datetime.min
+    end = local_time(end) if end else datetime.max
+    if end < start:
+        raise HTTPException(status_code=400, detail="'to' must not be before 'from'")
+    return to_notion_events(index.overlapping(start, end))
+
+@app.get("/api/events/upcoming", response_model=list[NotionEvent])
+async def get_upcoming_events(n: int = Query(10, ge=1, le=MAX_UPCOMING_EVENTS)):
+    await ensure_events_synced()
+    return to_notion_events(notion_cache.index.upcoming(n))
+
+
+
+news_db = NewsDatabase()
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+# Element types of the keyset cursors: (published_at, source_id) and (bm25 rank, rowid)
+NEWS_CURSOR = (str, str)
+SEARCH_CURSOR = ((int, float), int)
+
+def decode_cursor(cursor, types):
+    if not cursor:
+        return None
     try:
-        api = TagesSchaueClient()
-        articles = api.get_articles()
-        cleaned_articles = api.cleanup_articles(articles)
-        insert_articles(cleaned_articles)
-        print("News database updated successfully")
-    except Exception as e:
-        print(f"Error updating news database: {e}")
-
-@app.on_event("startup")
-def startup_event():
-    create_database()
-    if is_update_needed():
-        fetch_and_update_news()
-    scheduler = BackgroundScheduler()
-    scheduler.add_job(fetch_and_update_news, 'cron', hour=8)  # Jeden Tag um Mitternacht ausführen
-    scheduler.start()
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except ValueError:
+        values = None
+    # Anything else would reach SQLite's parameter binding and fail there
+    if (not isinstance(values, list) or len(values) != len(types)
+            or any(isinstance(value, bool) or not isinstance(value, kind) for value, kind in zip(values, types))):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return values
+
+class NewsResponseCache:
+    """Serialized /api/news bodies for the current articles.
+
+    Bodies are keyed on (limit, cursor) and carry a strong ETag hashed from
+    the body itself. They stay valid until the articles change, i.e. a
+    refresh commits or summaries arrive from the worker, and ``reset`` is
+    called.
+    """
+    def __init__(self, max_pages=128):
+        self.lock = threading.Lock()
+        self.max_pages = max_pages
+        self.last_update = None
+        # Bumped by every reset, so bodies read before it are not stored after it
+        self.generation = 0
+        self.bodies = {}
+
+    def reset(self, last_update):
+        with self.lock:
+            self.last_update = last_update
+            self.generation += 1
+            self.bodies = {}
+        # The unpaged list is what most clients ask for, so build it right away
+        self.get(None, None)
+
+    def age_seconds(self):
+        """Seconds since the cached data was refreshed, 0 before the first refresh."""
+        if self.last_update is None:
+            return 0
+        return max(int((datetime.now() - datetime.fromisoformat(self.last_update)).total_seconds()), 0)
+
+    def get(self, limit, cursor):
+        """Return (etag, body, next_cursor) for a page, serializing it on first use."""
+        key = (limit, cursor)
+        entry = self.bodies.get(key)
+        if entry is None:
+            generation = self.generation
+            articles, next_key = news_db.get_articles(limit, decode_cursor(cursor, NEWS_CURSOR))
+            next_cursor = encode_cursor(next_key) if next_key else None
+            body = json.dumps(articles).encode()
+            tag = hashlib.sha256(json.dumps([next_cursor]).encode() + body).hexdigest()[:32]
+            entry = (f'"{tag}"', body, next_cursor)
+            with self.lock:
+                # Skip storing if a refresh replaced the data while we were reading;
+                # the size cap keeps made-up cursors from growing the cache
+                if self.generation == generation and len(self.bodies) < self.max_pages:
+                    self.bodies[key] = entry
+        return entry
+
+news_cache = NewsResponseCache()
+
+def etag_matches(if_none_match, etag):
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# At most one news refresh runs per process, whoever triggers it
+news_refresh_lock = asyncio.Lock()
+# Failed background refreshes are retried no more often than this
+NEWS_RETRY_INTERVAL = timedelta(minutes=5)
+last_news_refresh_attempt = None
+# Keeps background refresh tasks referenced until they finish
+news_refresh_tasks = set()
+
+NEWS_REFRESH_SECONDS = metrics.Histogram(
+    "news_refresh_seconds", "Duration of a news refresh: fetch, clean, store and queue the summaries", ("outcome",)
+)
+# Observed by the worker process; absorb_summary_stats folds its rows from news.db into these
+SUMMARY_BATCH_SECONDS = metrics.Histogram(
+    "news_summarizer_batch_seconds", "Time the summarization model took per batch, by generation tier", ("tier",)
+)
+SUMMARY_TEXTS = metrics.Counter(
+    "news_summarized_texts_total", "Article texts summarized, by the tier they were routed to", ("tier",)
+)
+# How often the API looks for summaries the worker has written
+SUMMARY_POLL_SECONDS = float(os.environ.get('SUMMARY_POLL_SECONDS', 2))
+SUMMARY_WORKER_MAX_RESTARTS = 3
+# Keeps the summary watcher referenced while it runs
+summary_watch_tasks = set()
+
+def store_and_enqueue(api, articles):
+    """Store the articles with the summaries known so far and queue the rest for the worker."""
+    cleaned_articles = api.clean_articles(articles)
+    summaries, pending = api.known_summaries(cleaned_articles, summary_lookup=news_db.get_cached_summaries)
+    news_db.insert_articles(api.apply_summaries(cleaned_articles, summaries))
+    news_db.enqueue_summaries(pending)
+    news_cache.reset(news_db.last_update)
+    return len(pending)
+
+def absorb_summary_stats():
+    """Move the timings the summarization worker recorded into this process's metrics."""
+    for metric, tier, value in news_db.drain_summary_stats():
+        if metric == "batch_seconds":
+            SUMMARY_BATCH_SECONDS.observe(value, tier=tier)
+        elif metric == "texts":
+            SUMMARY_TEXTS.inc(int(value), tier=tier)
+
+def outstanding_summaries():
+    counts = news_db.summary_job_counts()
+    return counts["pending"] + counts["running"]
+
+async def watch_summaries():
+    """Publish the worker's summaries as they land, restarting it if it exited with jobs left."""
+    outstanding = await asyncio.to_thread(outstanding_summaries)
+    restarts = 0
+    while outstanding:
+        if not worker_running():
+            # A worker that keeps dying without progress (e.g. the model cannot load) is not retried
+            # forever; the jobs stay queued for the next refresh or restart
+            if restarts >= SUMMARY_WORKER_MAX_RESTARTS:
+                logging.error(f"Summarization worker keeps exiting, leaving {outstanding} articles queued")
+                return
+            if ensure_worker() is not None:
+                restarts += 1
+        await asyncio.sleep(SUMMARY_POLL_SECONDS)
+        remaining = await asyncio.to_thread(outstanding_summaries)
+        await asyncio.to_thread(absorb_summary_stats)
+        if remaining < outstanding:
+            restarts = 0
+            await asyncio.to_thread(news_cache.reset, news_db.last_update)
+            broker.publish("news.refreshed", {"last_update": news_db.last_update, "summaries_pending": remaining})
+        outstanding = remaining
+
+def watch_summaries_in_background():
+    if summary_watch_tasks:
+        return
+    task = asyncio.create_task(watch_summaries())
+    summary_watch_tasks.add(task)
+    task.add_done_callback(summary_watch_tasks.discard)
+
+async def fetch_and_update_news():
+    if news_refresh_lock.locked():
+        logging.info("News refresh already in progress")
+        return
+    async with news_refresh_lock:
+        started = time.perf_counter()
+        try:
+            api = TagesSchaueClient()
+            # Raises on an outage, so nothing is stored and last_update keeps the last good refresh
+            articles = await api.async_get_articles()
+            # Summarizing happens in the worker process; only cleaning runs here, off the event loop
+            pending = await asyncio.to_thread(store_and_enqueue, api, articles)
+            broker.publish("news.refreshed", {"last_update": news_db.last_update, "summaries_pending": pending})
+            if pending:
+                ensure_worker()
+                watch_summaries_in_background()
+            NEWS_REFRESH_SECONDS.observe(time.perf_counter() - started, outcome="ok")
+            logging.info("News database updated successfully")
+        except Exception as e:
+            NEWS_REFRESH_SECONDS.observe(time.perf_counter() - started, outcome="error")
+            logging.error(f"Error updating news database: {e}")
+
+def refresh_news_in_background():
+    """Start a news refresh task unless one is running or one failed recently."""
+    global last_news_refresh_attempt
+    now = datetime.now()
+    if news_refresh_lock.locked():
+        return
+    if last_news_refresh_attempt and now - last_news_refresh_attempt < NEWS_RETRY_INTERVAL:
+        return
+    last_news_refresh_attempt = now
+    task = asyncio.create_task(fetch_and_update_news())
+    news_refresh_tasks.add(task)
+    task.add_done_callback(news_refresh_tasks.discard)
 
 # Aktualisierter News API-Endpunkt
 @app.get("/api/news")
-def show_the_news():
-    if is_update_needed():
-        fetch_and_update_news()
-    return get_cached_articles()
+async def show_the_news(limit: Optional[int] = Query(None, ge=1, le=100), cursor: Optional[str] = None,
+                  if_none_match: Optional[str] = Header(None)):
+    # Serve what we have and let a single background refresh catch up
+    if news_db.is_update_needed():
+        refresh_news_in_background()
+    etag, body, next_cursor = await asyncio.to_thread(news_cache.get, limit, cursor)
+    headers = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Age": str(news_cache.age_seconds()),
+        "X-Refresh-In-Progress": "true" if news_refresh_lock.locked() else "false",
+    }
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@app.get("/api/news/search")
+async def search_the_news(response: Response, q: str, limit: int = Query(20, ge=1, le=100), cursor: Optional[str] = None):
+    articles, next_key = await asyncio.to_thread(news_db.search_articles, q, limit, decode_cursor(cursor, SEARCH_CURSOR))
+    if next_key:
+        response.headers["X-Next-Cursor"] = encode_cursor(next_key)
+    return articles
+
+
+############## Upstream cache ##############
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Hit/miss counters and size of the cache every connector fetches through."""
+    return await asyncio.to_thread(get_cache().stats)
+
+
+############## Metrics ##############
+@metrics.register_collector
+def collect_cache_metrics():
+    stats = get_cache().stats()
+    counters = ["hits", "misses", "revalidations", "not_modified", "stores", "evictions", "bypassed"]
+    return [
+        ("upstream_cache_events_total", "counter", "Upstream cache lookups and writes by outcome",
+         [((("event", name),), stats[name]) for name in counters]),
+        ("upstream_cache_entries", "gauge", "Responses held in the upstream cache",
+         [((("tier", "memory"),), stats["memory_entries"]), ((("tier", "disk"),), stats["disk_entries"])]),
+        ("upstream_cache_disk_bytes", "gauge", "Body bytes stored in the upstream cache database", [((), stats["disk_bytes"])]),
+    ]
+
+@metrics.register_collector
+def collect_breaker_metrics():
+    return [("upstream_breaker_open", "gauge", "1 while a provider's circuit breaker is not closed",
+             [((("provider", state["provider"]),), int(state["state"] != "closed")) for state in breaker_states()])]
+
+@metrics.register_collector
+def collect_summary_queue_metrics():
+    counts = news_db.summary_job_counts()
+    return [("news_summary_jobs", "gauge", "Articles waiting for the summarization worker, by state",
+             [((("state", state),), count) for state, count in sorted(counts.items())])]
+
+@metrics.register_collector
+def collect_startup_metrics():
+    return [("startup_phase_seconds", "gauge", "Time each startup and warmup phase took",
+             [((("phase", name),), phase["seconds"]) for name, phase in startup.phases.items()
+              if phase["seconds"] is not None])]
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """Request, upstream, cache, summarizer and news refresh metrics in Prometheus text format."""
+    await asyncio.to_thread(absorb_summary_stats)
+    body = await asyncio.to_thread(metrics.render)
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
+
+
+############## Health ##############
+@app.get("/api/health/live")
+async def liveness():
+    """The process is up and its event loop answers."""
+    return {"status": "alive", "uptime_seconds": time.perf_counter() - startup.started}
+
+@app.get("/api/health/ready")
+async def readiness():
+    """200 once the warmup has filled the local mirrors, 503 with its progress until then."""
+    report = startup.report()
+    return Response(content=json.dumps(report), media_type="application/json",
+                    status_code=200 if report["ready"] else 503)
+
+
+############## Circuit breakers ##############
+@app.get("/api/breakers")
+async def get_breakers():
+    """State, failure count and timeout of every upstream provider's circuit breaker."""
+    return breaker_states()
+
+
+############## Dashboard ##############
+DASHBOARD_NEWS_LIMIT = 20
+DASHBOARD_UPCOMING_EVENTS = 20
+
+def provider_deadline(name, default):
+    return float(os.environ.get(f'DASHBOARD_{name.upper()}_DEADLINE_SECONDS', default))
+
+class DashboardAggregator:
+    """Builds the combined /api/dashboard snapshot from all providers at once.
+
+    Every provider runs concurrently under its own deadline. One that misses
+    it keeps running in the background, and until it finishes its section is
+    the last payload it delivered, marked stale. A request therefore waits at
+    most for the longest deadline, not for the sum of the providers.
+    """
+    def __init__(self, providers, upstreams=None):
+        # name -> (coroutine function returning the section data, deadline in seconds)
+        self.providers = providers
+        # name -> upstream provider whose staleness (is_stale) marks the section stale
+        self.upstreams = upstreams or {}
+        self.last_good = {}
+        # In-flight provider calls, shared by overlapping requests
+        self.pending = {}
+
+    def _start(self, name):
+        task = self.pending.get(name)
+        if task is None:
+            fetch, _ = self.providers[name]
+            task = asyncio.create_task(fetch())
+            self.pending[name] = task
+            task.add_done_callback(lambda task: self._finished(name, task))
+        return task
+
+    def _finished(self, name, task):
+        self.pending.pop(name, None)
+        # Also marks a late failure as retrieved, so asyncio does not warn about it
+        if not task.cancelled() and task.exception() is None:
+            self.last_good[name] = (task.result(), datetime.now())
+
+    async def section(self, name):
+        _, deadline = self.providers[name]
+        try:
+            data = await asyncio.wait_for(asyncio.shield(self._start(name)), deadline)
+            upstream = self.upstreams.get(name)
+            return DashboardSection(data=data, stale=upstream is not None and is_stale(upstream),
+                                    updated_at=datetime.now())
+        except asyncio.TimeoutError:
+            error = f"No answer within {deadline:g}s"
+        except HTTPException as e:
+            error = e.detail
+        except Exception as e:
+            error = str(e)
+        data, updated_at = self.last_good.get(name, (None, None))
+        return DashboardSection(data=data, stale=True, updated_at=updated_at, error=error)
+
+    async def snapshot(self):
+        names = list(self.providers)
+        sections = await asyncio.gather(*(self.section(name) for name in names))
+        return DashboardSnapshot(generated_at=datetime.now(), sections=dict(zip(names, sections)))
+
+async def dashboard_tasks():
+    return jsonable_encoder(await get_todoist_tasks())
+
+async def dashboard_events():
+    return jsonable_encoder(await get_upcoming_events(n=DASHBOARD_UPCOMING_EVENTS))
+
+async def dashboard_weather():
+    return jsonable_encoder(await get_weather())
+
+async def dashboard_news():
+    if news_db.is_update_needed():
+        refresh_news_in_background()
+    _, body, _ = await asyncio.to_thread(news_cache.get, DASHBOARD_NEWS_LIMIT, None)
+    return json.loads(body)
+
+dashboard = DashboardAggregator({
+    "tasks": (dashboard_tasks, provider_deadline("tasks", 1.0)),
+    "events": (dashboard_events, provider_deadline("events", 1.0)),
+    "weather": (dashboard_weather, provider_deadline("weather", 2.0)),
+    "news": (dashboard_news, provider_deadline("news", 0.5)),
+}, upstreams={"tasks": "todoist", "events": "notion", "weather": "weather", "news": "tagesschau"})
+
+@app.get("/api/dashboard", response_model=DashboardSnapshot)
+async def get_dashboard():
+    """Tasks, upcoming events, weather and the first news page in one round trip."""
+    return await dashboard.snapshot()
 
 
 
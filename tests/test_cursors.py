@@ -0,0 +1,63 @@
+import base64
+
+import pytest
+from fastapi import HTTPException
+
+from main import NEWS_CURSOR, SEARCH_CURSOR, decode_cursor, encode_cursor
+
+
+def raw_cursor(text):
+    return base64.urlsafe_b64encode(text.encode()).decode()
+
+
+@pytest.mark.parametrize("types, key", [
+    (NEWS_CURSOR, ["2026-10-18T09:30:00", "tagesschau-123"]),
+    (SEARCH_CURSOR, [-3.25, 42]),
+    (SEARCH_CURSOR, [0, 7]),
+])
+def test_round_trip(types, key):
+    assert decode_cursor(encode_cursor(key), types) == key
+
+
+def test_missing_cursor_starts_from_the_top():
+    assert decode_cursor(None, NEWS_CURSOR) is None
+    assert decode_cursor("", SEARCH_CURSOR) is None
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    "abc",
+    raw_cursor("not json"),
+    base64.urlsafe_b64encode(b"\xff\xfe\x00").decode(),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    for types in (NEWS_CURSOR, SEARCH_CURSOR):
+        with pytest.raises(HTTPException) as error:
+            decode_cursor(cursor, types)
+        assert error.value.status_code == 400
+
+
+@pytest.mark.parametrize("types, text", [
+    (NEWS_CURSOR, '["2026-10-18T09:30:00"]'),
+    (NEWS_CURSOR, '["2026-10-18T09:30:00", "a", "b"]'),
+    (SEARCH_CURSOR, "[]"),
+    (SEARCH_CURSOR, '{"rank": 1.5, "rowid": 3}'),
+    (SEARCH_CURSOR, "1.5"),
+])
+def test_wrong_arity_is_rejected(types, text):
+    with pytest.raises(HTTPException):
+        decode_cursor(raw_cursor(text), types)
+
+
+@pytest.mark.parametrize("types, text", [
+    (NEWS_CURSOR, '["2026-10-18T09:30:00", 123]'),
+    (NEWS_CURSOR, '[null, "tagesschau-123"]'),
+    (SEARCH_CURSOR, '["1.5", 3]'),
+    (SEARCH_CURSOR, "[1.5, 3.0]"),
+    (SEARCH_CURSOR, "[true, 3]"),
+    (SEARCH_CURSOR, "[1.5, false]"),
+    (SEARCH_CURSOR, "[[1.5], 3]"),
+])
+def test_wrong_element_types_are_rejected(types, text):
+    with pytest.raises(HTTPException):
+        decode_cursor(raw_cursor(text), types)
@@ -0,0 +1,39 @@
+from datetime import datetime
+
+from APIs.NotionAPI.event_cache import EventIndex
+from APIs.NotionAPI.hookup_api import EventRecord
+
+
+def event(page_id, start, end):
+    start_date, start_time = start.split()
+    end_date, end_time = end.split()
+    return EventRecord(page_id, page_id, start_date, start_time, end_date, end_time, "")
+
+
+def ids(events):
+    return [event.page_id for event in events]
+
+
+INDEX = EventIndex([
+    event("standup", "2026-10-19 09:00", "2026-10-19 09:15"),
+    event("lunch", "2026-10-19 12:00", "2026-10-19 13:00"),
+    event("trip", "2026-10-17 08:00", "2026-10-21 18:00"),
+    event("review", "2026-10-19 10:00", "2026-10-19 11:00"),
+])
+
+
+def test_window_is_half_open_at_its_end():
+    # review starts exactly at the end of the window and belongs to the next one
+    assert ids(INDEX.overlapping(datetime(2026, 10, 19, 9), datetime(2026, 10, 19, 10))) == ["trip", "standup"]
+    assert ids(INDEX.overlapping(datetime(2026, 10, 19, 10), datetime(2026, 10, 19, 11))) == ["trip", "review"]
+
+
+def test_long_running_events_overlap_later_windows():
+    assert ids(INDEX.overlapping(datetime(2026, 10, 20), datetime(2026, 10, 21))) == ["trip"]
+    assert ids(INDEX.overlapping(datetime(2026, 10, 22), datetime(2026, 10, 23))) == []
+
+
+def test_upcoming_includes_running_events_and_ones_starting_now():
+    now = datetime(2026, 10, 19, 10)
+    assert ids(INDEX.upcoming(2, now)) == ["trip", "review"]
+    assert ids(INDEX.upcoming(5, now)) == ["trip", "review", "lunch"]
@@ -0,0 +1,140 @@
+import httpx
+import pytest
+
+from APIs import resilience
+from APIs.resilience import CircuitBreaker, CircuitOpenError, ProviderTransport
+
+
+class Clock:
+    """Stands in for the time module, so cooldowns pass without sleeping."""
+    def __init__(self):
+        self.now = 1_000.0
+
+    def time(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience, "time", clock)
+    return clock
+
+
+def test_opens_at_the_failure_threshold(clock):
+    breaker = CircuitBreaker("weather", failure_threshold=3, reset_timeout=30)
+    for _ in range(2):
+        breaker.record_failure("boom")
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure("boom")
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+
+def test_success_resets_the_failure_count(clock):
+    breaker = CircuitBreaker("weather", failure_threshold=2, reset_timeout=30)
+    breaker.record_failure("boom")
+    breaker.record_success()
+    breaker.record_failure("boom")
+    assert breaker.state == "closed"
+
+
+def test_half_open_after_the_cooldown_lets_one_trial_through(clock):
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure("boom")
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Only the one trial call; everything else still fails fast until it reports back
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.allow()
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("weather", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure("boom")
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure("still down")
+    assert breaker.state == "open"
+    assert breaker.snapshot()["retry_in_seconds"] == 30
+    assert not breaker.allow()
+
+
+def test_abandoned_trial_frees_the_slot(clock):
+    breaker = CircuitBreaker("weather", failure_threshold=1, reset_timeout=30)
+    breaker.record_failure("boom")
+    clock.now += 30
+    assert breaker.allow()
+    breaker.abandon()
+    assert breaker.allow()
+
+
+@pytest.fixture
+def breaker(monkeypatch, clock):
+    breaker = CircuitBreaker("weather", failure_threshold=2, reset_timeout=30)
+    monkeypatch.setitem(resilience._breakers, "weather", breaker)
+    return breaker
+
+
+def weather_client(handler):
+    return httpx.Client(transport=ProviderTransport(httpx.MockTransport(handler)))
+
+
+def test_transport_counts_timeouts_and_server_errors_as_failures(breaker):
+    answers = iter([httpx.ReadTimeout("slow"), httpx.Response(503)])
+
+    def handler(request):
+        answer = next(answers)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    with weather_client(handler) as http:
+        with pytest.raises(httpx.ReadTimeout):
+            http.get("https://api.met.no/weatherapi/locationforecast/2.0/complete")
+        assert breaker.failures == 1
+        assert http.get("https://api.met.no/weatherapi/locationforecast/2.0/complete").status_code == 503
+    assert breaker.state == "open"
+    assert breaker.last_failure == "HTTP 503"
+
+
+def test_transport_fails_fast_while_open(breaker):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(500)
+
+    with weather_client(handler) as http:
+        for _ in range(2):
+            http.get("https://api.met.no/forecast")
+        with pytest.raises(CircuitOpenError):
+            http.get("https://api.met.no/forecast")
+    assert len(calls) == 2
+
+
+def test_transport_does_not_count_client_errors(breaker):
+    with weather_client(lambda request: httpx.Response(404)) as http:
+        for _ in range(3):
+            http.get("https://api.met.no/forecast")
+    assert breaker.state == "closed" and breaker.failures == 0
+
+
+def test_transport_applies_the_provider_timeout(breaker):
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"])
+        return httpx.Response(200)
+
+    with weather_client(handler) as http:
+        http.get("https://api.met.no/forecast")
+    assert seen[0]["read"] == resilience.provider_timeout("weather")
@@ -0,0 +1,100 @@
+from APIs.NewsAPI.summarization import (
+    GENERATION, LengthAwareSummarizer, chunk_text, extractive_summary, generation_lengths,
+)
+
+
+def count_tokens(text):
+    """One token per word, standing in for the model's tokenizer."""
+    return len(text.split())
+
+
+class FakePipeline:
+    """Records every batch and answers each text with a fixed summary per tier."""
+    def __init__(self, chunk_summary="short chunk summary."):
+        self.chunk_summary = chunk_summary
+        self.calls = []
+
+    def __call__(self, texts, tier, lengths):
+        self.calls.append((tier, list(texts), lengths))
+        if tier == "chunk":
+            return [self.chunk_summary for _ in texts]
+        return [f"{tier} summary" for _ in texts]
+
+
+def words(n, word="word"):
+    return " ".join([word] * n) + "."
+
+
+def sentences(n, length=10):
+    return " ".join(words(length, f"w{i}") for i in range(n))
+
+
+def test_texts_are_routed_by_token_count():
+    pipeline = FakePipeline()
+    summarizer = LengthAwareSummarizer(pipeline, count_tokens, short_tokens=10, chunk_tokens=50)
+    texts = [words(10), words(11), words(50), sentences(8)]
+    summaries, tiers = summarizer.summarize(texts)
+    assert tiers == ["extractive", "direct", "direct", "long"]
+    assert summaries[0] == texts[0]
+    assert summaries[1:3] == ["direct summary", "direct summary"]
+    assert summaries[3] == "reduce summary"
+    # Short texts never reach the model
+    assert all(texts[0] not in batch for _, batch, _ in pipeline.calls)
+
+
+def test_long_texts_are_chunked_and_mapped_in_one_batch_then_reduced():
+    pipeline = FakePipeline()
+    summarizer = LengthAwareSummarizer(pipeline, count_tokens, short_tokens=10, chunk_tokens=50)
+    summarizer.summarize([sentences(8), sentences(12)])
+    chunk_calls = [batch for tier, batch, _ in pipeline.calls if tier == "chunk"]
+    reduce_calls = [batch for tier, batch, _ in pipeline.calls if tier == "reduce"]
+    # 8 and 12 sentences of 11 tokens in chunks of at most 50 tokens: 2 + 3 chunks in one map round,
+    # batched by their generation lengths (the short last chunks get a lower min_length)
+    chunks = [chunk for batch in chunk_calls for chunk in batch]
+    assert len(chunks) == 5 and len(chunk_calls) == 2
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+    assert reduce_calls == [["short chunk summary. short chunk summary.",
+                             "short chunk summary. short chunk summary. short chunk summary."]]
+
+
+def test_map_rounds_repeat_until_the_joined_summaries_fit():
+    # Chunk summaries as long as their chunks never shrink, so the rounds stop at MAX_MAP_ROUNDS
+    pipeline = FakePipeline(chunk_summary=words(40))
+    summarizer = LengthAwareSummarizer(pipeline, count_tokens, short_tokens=10, chunk_tokens=50)
+    summaries, _ = summarizer.summarize([sentences(20)])
+    assert [tier for tier, _, _ in pipeline.calls].count("chunk") == 3
+    assert summaries == ["reduce summary"]
+
+
+def test_chunk_text_splits_overlong_sentences_at_words():
+    chunks = chunk_text(words(120) + " " + words(5, "tail"), count_tokens, limit=50)
+    assert all(count_tokens(chunk) <= 50 for chunk in chunks)
+    assert " ".join(chunks).split() == (words(120) + " " + words(5, "tail")).split()
+
+
+def test_extractive_summary_keeps_the_richest_sentences_in_order():
+    text = ("Officials met today. Storm damage along the coast is severe. "
+            "Storm hits the coast. The coast storm season started early.")
+    # The second and fourth sentence score the same; the earlier one wins the tie
+    assert extractive_summary(text) == "Storm damage along the coast is severe. Storm hits the coast."
+    assert extractive_summary("Only one sentence.") == "Only one sentence."
+
+
+def test_min_length_is_clamped_for_short_inputs():
+    assert generation_lengths("reduce", 400) == GENERATION["reduce"]
+    # Shorter than the configured min_length of the reduce pass
+    assert generation_lengths("reduce", 30) == {"max_length": GENERATION["reduce"]["max_length"], "min_length": 10}
+    assert generation_lengths("reduce", 12)["min_length"] == 0
+    assert generation_lengths("direct", 85)["min_length"] == GENERATION["direct"]["min_length"]
+
+
+def test_short_reduce_inputs_are_not_padded():
+    pipeline = FakePipeline(chunk_summary="tiny.")
+    summarizer = LengthAwareSummarizer(pipeline, count_tokens, short_tokens=10, chunk_tokens=50)
+    summarizer.summarize([sentences(8), sentences(40, length=30)])
+    reduce_lengths = [lengths["min_length"] for tier, _, lengths in pipeline.calls if tier == "reduce"]
+    # Each input is batched with the lengths it gets; none asks for more than half its tokens
+    # "tiny. tiny." and 40 chunk summaries of 1 token, against a configured min_length of 50
+    assert sorted(reduce_lengths) == [0, 20]
+    for tier, batch, lengths in pipeline.calls:
+        assert all(lengths["min_length"] <= count_tokens(text) / 2 for text in batch)
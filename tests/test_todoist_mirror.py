@@ -0,0 +1,79 @@
+import asyncio
+
+import httpx
+import pytest
+
+from APIs.TodoistAPI.todoist_mirror import TodoistMirror
+from bench.stubs import StubTodoist
+
+
+@pytest.fixture
+def todoist():
+    stub = StubTodoist(
+        items=[{"id": "1", "content": "Buy milk", "priority": 1, "project_id": "1", "due": None, "child_order": 0},
+               {"id": "2", "content": "Call Anna", "priority": 4, "project_id": "1", "due": None, "child_order": 1}],
+        projects=[{"id": "1", "name": "Inbox", "child_order": 0}],
+    ).start()
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def mirror(todoist, tmp_path):
+    return TodoistMirror(api_key="test", path=str(tmp_path / "mirror.db"), sync_url=todoist.sync_url)
+
+
+def run(coroutine_function, *args):
+    async def main():
+        async with httpx.AsyncClient() as client:
+            return await coroutine_function(*args, client=client)
+    return asyncio.run(main())
+
+
+def contents(mirror):
+    return [task["content"] for task in mirror.get_tasks()]
+
+
+def test_first_sync_is_full_and_later_ones_are_incremental(todoist, mirror):
+    payload = run(mirror.sync)
+    assert payload["full_sync"]
+    assert contents(mirror) == ["Buy milk", "Call Anna"]
+    assert [project["name"] for project in mirror.get_projects()] == ["Inbox"]
+
+    todoist.edit("2", content="Call Anna back")
+    payload = run(mirror.sync)
+    assert not payload["full_sync"]
+    assert [item["id"] for item in payload["items"]] == ["2"]
+    assert contents(mirror) == ["Buy milk", "Call Anna back"]
+
+
+def test_sync_sends_the_stored_token(todoist, mirror):
+    run(mirror.sync)
+    first_token = mirror.sync_token
+    run(mirror.sync)
+    assert [request["sync_token"] for request in todoist.requests] == ["*", first_token]
+
+
+def test_batch_applies_commands_and_resolves_temp_ids(mirror):
+    run(mirror.sync)
+    results = run(mirror.batch, [
+        {"type": "add", "content": "Water plants", "temp_id": "new-task"},
+        {"type": "update", "task_id": "new-task", "priority": 3},
+        {"type": "close", "task_id": "1"},
+        {"type": "close", "task_id": "404"},
+    ])
+    assert [result["status"] for result in results] == ["ok", "ok", "ok", "error"]
+    assert results[0]["task_id"] == results[1]["task_id"] != "new-task"
+    assert results[3]["error"] == "Item not found"
+    tasks = {task["content"]: task for task in mirror.get_tasks()}
+    assert set(tasks) == {"Call Anna", "Water plants"}
+    assert tasks["Water plants"]["priority"] == 3
+
+
+def test_a_reopened_mirror_counts_as_synced(todoist, mirror, tmp_path):
+    assert not mirror.is_synced
+    run(mirror.sync)
+    reopened = TodoistMirror(api_key="test", path=str(tmp_path / "mirror.db"), sync_url=todoist.sync_url)
+    # A restart keeps the stored token, so /api/tasks serves the mirror without a blocking full sync
+    assert reopened.is_synced and reopened.last_sync is None
+    assert contents(reopened) == ["Buy milk", "Call Anna"]
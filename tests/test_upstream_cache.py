@@ -0,0 +1,104 @@
+import httpx
+import pytest
+
+from APIs.upstream_cache import CachingTransport, UpstreamCache, freshness_lifetime
+
+
+class Upstream:
+    """MockTransport handler answering from a queue of responses and keeping the requests."""
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        status, headers, body = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        return httpx.Response(status, headers=headers, content=body)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return UpstreamCache(path=str(tmp_path / "cache.db"))
+
+
+def client(cache, upstream):
+    return httpx.Client(transport=CachingTransport(cache, httpx.MockTransport(upstream)))
+
+
+def test_fresh_response_is_served_from_the_cache(cache):
+    upstream = Upstream((200, {"Cache-Control": "max-age=60"}, b"forecast"))
+    with client(cache, upstream) as http:
+        assert http.get("https://api.example/forecast").text == "forecast"
+        assert http.get("https://api.example/forecast").text == "forecast"
+    assert len(upstream.requests) == 1
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_revalidated_with_its_validators(cache):
+    upstream = Upstream(
+        (200, {"Cache-Control": "max-age=0", "ETag": '"v1"'}, b"old"),
+        (200, {"Cache-Control": "max-age=0", "ETag": '"v2"'}, b"new"),
+    )
+    with client(cache, upstream) as http:
+        http.get("https://api.example/forecast")
+        assert http.get("https://api.example/forecast").text == "new"
+    assert "if-none-match" not in upstream.requests[0].headers
+    assert upstream.requests[1].headers["if-none-match"] == '"v1"'
+    assert cache.stats()["revalidations"] == 1
+
+
+def test_not_modified_refreshes_the_stored_entry(cache):
+    last_modified = "Sat, 17 Oct 2026 10:00:00 GMT"
+    upstream = Upstream(
+        (200, {"Cache-Control": "max-age=0", "Last-Modified": last_modified, "Content-Type": "application/json"},
+         b'{"ok": true}'),
+        (304, {"Cache-Control": "max-age=60"}, b""),
+    )
+    with client(cache, upstream) as http:
+        http.get("https://api.example/forecast")
+        refreshed = http.get("https://api.example/forecast")
+        # Fresh again after the 304, so this one never reaches the upstream
+        again = http.get("https://api.example/forecast")
+    assert upstream.requests[1].headers["if-modified-since"] == last_modified
+    assert len(upstream.requests) == 2
+    for response in (refreshed, again):
+        assert response.status_code == 200
+        assert response.json() == {"ok": True}
+        assert response.headers["content-type"] == "application/json"
+        assert response.headers["cache-control"] == "max-age=60"
+    assert cache.stats()["not_modified"] == 1
+
+
+def test_vary_keeps_responses_for_other_header_values_apart(cache):
+    upstream = Upstream(
+        (200, {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}, b"Hallo"),
+        (200, {"Cache-Control": "max-age=60", "Vary": "Accept-Language"}, b"Hello"),
+    )
+    with client(cache, upstream) as http:
+        assert http.get("https://api.example/greeting", headers={"Accept-Language": "de"}).text == "Hallo"
+        assert http.get("https://api.example/greeting", headers={"Accept-Language": "en"}).text == "Hello"
+    assert len(upstream.requests) == 2
+
+
+def test_least_recently_used_entries_are_evicted_over_the_size_bound(tmp_path):
+    cache = UpstreamCache(path=str(tmp_path / "cache.db"), max_bytes=250)
+    upstream = Upstream((200, {"Cache-Control": "max-age=60"}, b"x" * 100))
+    with client(cache, upstream) as http:
+        http.get("https://api.example/a")
+        http.get("https://api.example/b")
+        http.get("https://api.example/a")
+        http.get("https://api.example/c")
+        stats = cache.stats()
+        assert (stats["disk_entries"], stats["disk_bytes"], stats["evictions"]) == (2, 200, 1)
+        # b was read least recently, so it was dropped from both tiers
+        http.get("https://api.example/b")
+    assert [request.url.path for request in upstream.requests] == ["/a", "/b", "/c", "/b"]
+
+
+def test_freshness_lifetime_follows_the_headers():
+    now = 1_800_000_000
+    assert freshness_lifetime(httpx.Headers({"Cache-Control": "max-age=120", "Age": "20"}), now) == 100
+    assert freshness_lifetime(httpx.Headers({"Cache-Control": "no-cache, max-age=120"}), now) == 0
+    assert freshness_lifetime(httpx.Headers({"Date": "Sat, 17 Oct 2026 10:00:00 GMT",
+                                             "Expires": "Sat, 17 Oct 2026 10:30:00 GMT"}), now) == 1800
+    assert freshness_lifetime(httpx.Headers({"Expires": "0"}), now) == 0
@@ -0,0 +1,61 @@
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+import main
+from APIs.WeatherAPI.hookup_api import ForecastSnapshot, WeatherAPI
+
+
+def time_step(when, temperature):
+    return {"time": when.strftime("%Y-%m-%dT%H:%M:%SZ"),
+            "data": {"instant": {"details": {"air_temperature": temperature, "wind_speed": 2.0}},
+                     "next_6_hours": {"details": {"precipitation_amount": 0.0}}}}
+
+
+def snapshot(hourly=48, six_hourly=4):
+    """Hourly steps from the start of the current hour, then six-hour steps, like yr's forecast."""
+    first = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    times = [first + timedelta(hours=i) for i in range(hourly)]
+    times += [times[-1] + timedelta(hours=6 * (i + 1)) for i in range(six_hourly)]
+    return ForecastSnapshot(latitude=52.52, longitude=13.405,
+                            timeseries=tuple(time_step(when, 10.0 + i) for i, when in enumerate(times)),
+                            expires=first + timedelta(hours=1))
+
+
+def test_upcoming_returns_at_most_hours_steps():
+    forecast = snapshot()
+    for hours in (1, 3, 24):
+        window = forecast.upcoming(hours)
+        assert window.start == 0
+        assert len(forecast.times[window]) == hours
+
+
+def test_upcoming_counts_hours_not_steps_in_the_six_hour_part():
+    forecast = snapshot(hourly=2, six_hourly=4)
+    # Steps at +0h, +1h, +7h and +13h start within 14 hours of the current one
+    assert len(forecast.times[forecast.upcoming(14)]) == 4
+    assert len(forecast.times[forecast.upcoming(None)]) == 6
+
+
+def test_upcoming_of_an_empty_forecast_is_empty():
+    forecast = ForecastSnapshot(latitude=0, longitude=0, timeseries=(), expires=datetime.now(timezone.utc))
+    assert forecast.upcoming(3) == slice(0, 0)
+
+
+def test_hourly_endpoint_serializes_the_columns(monkeypatch):
+    forecast = snapshot()
+
+    async def get_hourly_forecast(self, latitude, longitude, hours=None, client=None):
+        return self.hourly_columns(forecast, hours)
+
+    monkeypatch.setattr(WeatherAPI, "async_get_hourly_forecast", get_hourly_forecast)
+    response = asyncio.run(main.get_hourly_weather(hours=2))
+    rows = json.loads(response.body)
+    assert [row["temperature"] for row in rows] == [10.0, 11.0]
+    # yr gives no UV or one-hour amounts in these steps
+    assert rows[0]["uv_index"] is None and rows[0]["precipitation"] is None
+    assert rows[0]["time"] == np.datetime_as_string(np.datetime64(int(forecast.times[0]), "s")) + "Z"
+    assert set(rows[0]) == {"time", "temperature", "feels_like", "wind_speed", "precipitation",
+                            "precipitation_next_6h", "uv_index", "suggestion"}